@@ -99,5 +99,26 @@ ALL_N8N_NODES = {
                 "description": "The JavaScript code to execute"
             }
         }
+    },
+    "split-in-batches": {
+        "name": "Split In Batches",
+        "category": "Flow",
+        "color": "#9B59B6",
+        "icon": "fa:th-large",
+        "description": "Runs the following nodes once per batch of items; outputs the last batch's result",
+        "inputs": 1,
+        "outputs": 1,
+        "properties": {
+            "batchSize": {
+                "type": "number",
+                "default": 100,
+                "description": "The number of items in each batch"
+            },
+            "concurrency": {
+                "type": "number",
+                "default": 1,
+                "description": "The number of batches processed at the same time"
+            }
+        }
     }
 }
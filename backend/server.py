@@ -1,10 +1,20 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, status, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from bson import ObjectId, json_util
+from pymongo import IndexModel, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+import redis.asyncio as aioredis
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential_jitter
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
 from pydantic import BaseModel, Field, EmailStr, validator
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Tuple, Union, AsyncIterator, Iterable, Iterator, Literal
 from datetime import datetime, timedelta
 from pathlib import Path
 import os
@@ -13,17 +23,196 @@ import uuid
 import json
 import jwt
 import hashlib
+import base64
 import bcrypt
 import asyncio
-from contextlib import asynccontextmanager
+import zlib
+import gzip
+import time
+import sys
+import threading
+import functools
+import collections
+import itertools
+import heapq
+import abc
+import tracemalloc
+import socket
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+# Start of module initialisation, for the startup timing report
+STARTUP_BEGAN = time.perf_counter()
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics
+# With several uvicorn workers, PROMETHEUS_MULTIPROC_DIR must be set in the process
+# environment (not .env) so every worker writes its samples to a shared directory
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "API request latency", ["method", "route", "status"]
+)
+EXECUTIONS_TOTAL = Counter(
+    "workflow_executions_total", "Finished workflow executions", ["status"]
+)
+NODE_DURATION = Histogram(
+    "workflow_node_duration_seconds", "Node execution time", ["node_type", "status"]
+)
+ENGINE_QUEUE_DEPTH = Gauge(
+    "engine_queue_depth", "Executions waiting to start", multiprocess_mode="livesum"
+)
+ENGINE_IN_FLIGHT = Gauge(
+    "engine_executions_in_flight", "Executions currently running", multiprocess_mode="livesum"
+)
+EXECUTION_QUEUE_WAIT = Histogram(
+    "engine_queue_wait_seconds", "Time executions wait for admission", ["priority"]
+)
+NODE_CACHE_REQUESTS = Counter(
+    "node_cache_requests_total", "Node result cache lookups", ["result"]
+)
+IDEMPOTENT_REPLAYS = Counter(
+    "idempotent_replays_total", "Trigger requests answered with an earlier run", ["trigger"]
+)
+STARTUP_DURATION = Gauge(
+    "app_startup_seconds", "Time spent in each startup phase", ["phase"], multiprocess_mode="max"
+)
+MONGO_LATENCY = Histogram(
+    "mongo_operation_duration_seconds", "MongoDB command latency", ["collection", "operation", "outcome"]
+)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Record the latency of every MongoDB command"""
+    
+    def __init__(self):
+        self.collections: Dict[int, str] = {}
+    
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        self.collections[event.request_id] = target if isinstance(target, str) else ""
+    
+    def _observe(self, event, outcome: str):
+        collection = self.collections.pop(event.request_id, "")
+        duration = event.duration_micros / 1e6
+        MONGO_LATENCY.labels(collection, event.command_name, outcome).observe(duration)
+        
+        # Motor copies the request context into its executor threads
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_span(f"mongo.{event.command_name} {collection}".strip(), time.perf_counter() - duration, duration)
+    
+    def succeeded(self, event):
+        self._observe(event, "success")
+    
+    def failed(self, event):
+        self._observe(event, "failure")
+
+# Tracing
+# Opt-in per-request span recording; requests slower than TRACE_SLOW_MS are kept
+TRACING_ENABLED = os.environ.get('REQUEST_TRACING', '').lower() in ('1', 'true', 'yes')
+TRACE_SLOW_MS = float(os.environ.get('TRACE_SLOW_MS', '500'))
+TRACE_BUFFER_SIZE = int(os.environ.get('TRACE_BUFFER_SIZE', '200'))
+
+class RequestTrace:
+    """Timed spans recorded while serving one request"""
+    
+    def __init__(self, method: str, path: str):
+        self.id = str(uuid.uuid4())
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.spans: List[Dict[str, Any]] = []
+    
+    def add_span(self, name: str, started: float, duration: float):
+        self.spans.append({
+            "name": name,
+            "offset_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3)
+        })
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": sorted(self.spans, key=lambda span: span["offset_ms"])
+        }
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+slow_traces = collections.deque(maxlen=TRACE_BUFFER_SIZE)
+
+@contextmanager
+def trace_span(name: str):
+    """Record a span on the current request trace, if any"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, started, time.perf_counter() - started)
+
+class TracedRoute(APIRoute):
+    """Route that records a span for the whole handler and one for the endpoint.
+    
+    The difference between the two is FastAPI's own work: body validation,
+    dependency resolution and response serialization.
+    """
+    
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router re-creates routes from already wrapped endpoints
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "_traced", False):
+            original_endpoint = endpoint
+            
+            @functools.wraps(original_endpoint)
+            async def endpoint(*args, **kwargs):
+                with trace_span("endpoint"):
+                    return await original_endpoint(*args, **kwargs)
+            
+            endpoint._traced = True
+        
+        super().__init__(path, endpoint, **kwargs)
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def traced_handler(request: Request):
+            with trace_span("route"):
+                return await handler(request)
+        
+        return traced_handler
+
 # MongoDB connection
+# Pool options read from the environment; unset ones keep the driver defaults
+MONGO_CLIENT_OPTIONS = {
+    option: cast(os.environ[name])
+    for name, option, cast in (
+        ('MONGO_MAX_POOL_SIZE', 'maxPoolSize', int),
+        ('MONGO_MIN_POOL_SIZE', 'minPoolSize', int),
+        ('MONGO_MAX_IDLE_TIME_MS', 'maxIdleTimeMS', int),
+        ('MONGO_MAX_CONNECTING', 'maxConnecting', int),
+        ('MONGO_CONNECT_TIMEOUT_MS', 'connectTimeoutMS', int),
+        ('MONGO_SOCKET_TIMEOUT_MS', 'socketTimeoutMS', int),
+        ('MONGO_SERVER_SELECTION_TIMEOUT_MS', 'serverSelectionTimeoutMS', int),
+        ('MONGO_WAIT_QUEUE_TIMEOUT_MS', 'waitQueueTimeoutMS', int),
+        # Comma-separated, e.g. "zstd,snappy,zlib"; the server picks the first it supports
+        ('MONGO_COMPRESSORS', 'compressors', str),
+    )
+    if os.environ.get(name)
+}
+
+# The client connects lazily, on the first command
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics()], **MONGO_CLIENT_OPTIONS)
 db = client[os.environ['DB_NAME']]
 
 # Security
@@ -32,6 +221,105 @@ SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'quantamworkforce-secret-key-2025'
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Webhooks
+# Seconds a "lastNode" webhook caller waits for the run before getting a 202
+WEBHOOK_RESPONSE_TIMEOUT = float(os.environ.get('WEBHOOK_RESPONSE_TIMEOUT', '30'))
+
+# Idempotency keys
+# Seconds a repeated Idempotency-Key on execute or webhook calls returns the original run
+IDEMPOTENCY_KEY_TTL = float(os.environ.get('IDEMPOTENCY_KEY_TTL', str(24 * 3600)))
+# Seconds a claimed key waits for its run to start before a repeat may take it over
+IDEMPOTENCY_CLAIM_SECONDS = float(os.environ.get('IDEMPOTENCY_CLAIM_SECONDS', '30'))
+
+# Bulk workflow import/export
+WORKFLOW_IMPORT_BATCH = int(os.environ.get('WORKFLOW_IMPORT_BATCH', '500'))
+# Maximum number of runs one bulk execute request may start
+BULK_EXECUTE_MAX = int(os.environ.get('BULK_EXECUTE_MAX', '10000'))
+
+# Multi-worker coordination
+# Unique per process; used as the owner of leader leases
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+LEADER_LEASE_SECONDS = float(os.environ.get('LEADER_LEASE_SECONDS', '30'))
+# Redis (or any Redis-compatible server) for cross-worker events; in-process when unset
+REDIS_URL = os.environ.get('REDIS_URL')
+EVENT_CHANNEL_PREFIX = os.environ.get('EVENT_CHANNEL_PREFIX', 'quantamworkforce:')
+# Seconds an authenticated user stays cached per worker; 0 disables the cache. Only
+# used with REDIS_URL, without which other workers never see a user's invalidations
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))
+
+# Workflow revisions
+# Every Nth revision of a workflow's graph is stored in full, the others as deltas
+WORKFLOW_SNAPSHOT_INTERVAL = int(os.environ.get('WORKFLOW_SNAPSHOT_INTERVAL', '50'))
+# Revisions older than this many days are thinned to the last one of each day
+WORKFLOW_REVISION_KEEP_DAYS = int(os.environ.get('WORKFLOW_REVISION_KEEP_DAYS', '30'))
+WORKFLOW_REVISION_COMPACT_INTERVAL = float(os.environ.get('WORKFLOW_REVISION_COMPACT_INTERVAL', '3600'))
+# Seconds after which a stored revision whose workflow update never landed may be replaced
+WORKFLOW_REVISION_CLAIM_SECONDS = float(os.environ.get('WORKFLOW_REVISION_CLAIM_SECONDS', '30'))
+
+# Workflow deletion
+# A deleted workflow's executions, revisions and blobs are purged in the background,
+# this many documents per chunk with a pause (seconds) between chunks
+WORKFLOW_PURGE_BATCH = int(os.environ.get('WORKFLOW_PURGE_BATCH', '500'))
+WORKFLOW_PURGE_PAUSE = float(os.environ.get('WORKFLOW_PURGE_PAUSE', '0.1'))
+WORKFLOW_PURGE_INTERVAL = float(os.environ.get('WORKFLOW_PURGE_INTERVAL', '5'))
+
+# Node result cache
+# Entries and seconds a cacheable node's output is kept per worker; 0 entries disables it
+NODE_CACHE_SIZE = int(os.environ.get('NODE_CACHE_SIZE', '10000'))
+NODE_CACHE_TTL = float(os.environ.get('NODE_CACHE_TTL', '300'))
+# Also share cached results between workers through REDIS_URL
+NODE_CACHE_SHARED = os.environ.get('NODE_CACHE_SHARED', 'false').lower() == 'true'
+
+# Execution admission
+# Executions running at once per worker; further runs wait in a fair queue (0 means no limit)
+ENGINE_MAX_CONCURRENCY = int(os.environ.get('ENGINE_MAX_CONCURRENCY', '100'))
+
+def parse_priority_weights(value: str) -> Dict[str, float]:
+    """Parse "name=weight,..." into positive weights per priority class; blank entries are skipped"""
+    weights = {}
+    for entry in filter(None, (entry.strip() for entry in value.split(","))):
+        name, _, weight = entry.partition("=")
+        try:
+            weights[name.strip()] = float(weight)
+        except ValueError:
+            weight = None
+        if not name.strip() or weight is None or weights[name.strip()] <= 0:
+            raise ValueError(f"EXECUTION_PRIORITY_WEIGHTS entries must be name=<positive weight>, got {entry!r}")
+    return weights
+
+# Relative share of admissions per priority class, e.g. "interactive=8,webhook=4,batch=1"
+EXECUTION_PRIORITY_WEIGHTS = parse_priority_weights(
+    os.environ.get('EXECUTION_PRIORITY_WEIGHTS', 'interactive=8,webhook=4,batch=1')
+)
+
+# Node resilience
+# Seconds a node attempt may run unless its config sets "timeout"; 0 means no limit
+NODE_DEFAULT_TIMEOUT = float(os.environ.get('NODE_DEFAULT_TIMEOUT', '0'))
+# Successful runs of a node needed before its latency percentile is used to hedge
+NODE_HEDGE_MIN_SAMPLES = int(os.environ.get('NODE_HEDGE_MIN_SAMPLES', '20'))
+
+# Execution storage
+# Where the engine persists executions: "mongo", "memory" or "file" (single worker only)
+EXECUTION_STORE = os.environ.get('EXECUTION_STORE', 'mongo')
+EXECUTION_STORE_PATH = os.environ.get('EXECUTION_STORE_PATH', str(ROOT_DIR / 'data' / 'executions.jsonl'))
+# What a run persists unless the workflow or request overrides it:
+# "all", "errors" (full record only for failed runs), "summary" (status only) or "none"
+EXECUTION_SAVE_POLICY = os.environ.get('EXECUTION_SAVE_POLICY', 'all')
+# Finished executions kept by the in-memory store before the oldest are dropped
+EXECUTION_MEMORY_LIMIT = int(os.environ.get('EXECUTION_MEMORY_LIMIT', '10000'))
+
+# Payload storage
+# Execution payloads larger than this many bytes (as JSON) are moved to blob storage
+PAYLOAD_INLINE_LIMIT = int(os.environ.get('PAYLOAD_INLINE_LIMIT', str(64 * 1024)))
+
+# Execution retention
+# Days to keep finished executions unless a workflow overrides it; 0 keeps them forever
+EXECUTION_RETENTION_DAYS = int(os.environ.get('EXECUTION_RETENTION_DAYS', '0'))
+# When set, expired executions are archived here as gzipped JSONL before deletion
+EXECUTION_ARCHIVE_DIR = os.environ.get('EXECUTION_ARCHIVE_DIR')
+EXECUTION_PRUNE_INTERVAL = float(os.environ.get('EXECUTION_PRUNE_INTERVAL', '3600'))
+EXECUTION_PRUNE_BATCH = int(os.environ.get('EXECUTION_PRUNE_BATCH', '500'))
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -80,6 +368,10 @@ class Token(BaseModel):
 # MODELS - Workflow Management
 # =============================================================================
 
+SavePolicy = Literal["all", "errors", "summary", "none"]
+# Admission class of a run: manual runs, webhook calls, bulk and scheduled runs
+ExecutionPriority = Literal["interactive", "webhook", "batch"]
+
 class NodeData(BaseModel):
     label: str
     properties: Dict[str, Any] = {}
@@ -105,6 +397,8 @@ class WorkflowCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=1000)
     tags: List[str] = []
+    retention_days: Optional[int] = Field(None, ge=0)
+    save_policy: Optional[SavePolicy] = None
     
     @validator('name')
     def validate_name(cls, v):
@@ -117,6 +411,8 @@ class WorkflowUpdate(BaseModel):
     description: Optional[str] = None
     tags: Optional[List[str]] = None
     is_active: Optional[bool] = None
+    retention_days: Optional[int] = Field(None, ge=0)
+    save_policy: Optional[SavePolicy] = None
     nodes: Optional[List[WorkflowNode]] = None
     connections: Optional[List[WorkflowConnection]] = None
 
@@ -130,31 +426,86 @@ class WorkflowResponse(BaseModel):
     is_active: bool = False
     last_run: Optional[datetime] = None
     executions: int = 0
+    retention_days: Optional[int] = None
+    save_policy: Optional[SavePolicy] = None
+    revision: int = 0
     created_at: datetime
     updated_at: datetime
     created_by: str
+
+class WorkflowRevisionResponse(BaseModel):
+    workflow_id: str
+    revision: int
+    kind: str  # 'snapshot' or 'delta'
+    created_at: datetime
+    created_by: str
+
+class WorkflowDeletionResponse(BaseModel):
+    id: str
+    workflow_id: str
+    name: str
+    status: str  # 'pending', 'running' or 'completed'
+    deleted: Dict[str, int] = {}
+    requested_at: datetime
+    finished_at: Optional[datetime] = None
     
+# Workflow documents are validated on every write, so reads can skip Pydantic and
+# hand the stored document straight to orjson. The projection and defaults keep
+# the payload identical to a serialized WorkflowResponse.
+WORKFLOW_RESPONSE_PROJECTION = {"_id": 0, **{name: 1 for name in WorkflowResponse.model_fields}}
+WORKFLOW_RESPONSE_DEFAULTS = {
+    name: field.get_default(call_default_factory=True)
+    for name, field in WorkflowResponse.model_fields.items()
+    if not field.is_required()
+}
+
+def workflow_response_document(workflow: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored workflow document shaped like a WorkflowResponse"""
+    return {**WORKFLOW_RESPONSE_DEFAULTS, **workflow}
+
+class WorkflowImport(BaseModel):
+    id: Optional[str] = None
+    name: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = Field(None, max_length=1000)
+    tags: List[str] = []
+    nodes: List[WorkflowNode] = []
+    connections: List[WorkflowConnection] = []
+    is_active: bool = False
+    retention_days: Optional[int] = Field(None, ge=0)
+    save_policy: Optional[SavePolicy] = None
+
 class WorkflowExecution(BaseModel):
     id: str
     workflow_id: str
-    status: str  # 'running', 'completed', 'failed', 'stopped'
-    started_at: datetime
+    status: str  # 'queued', 'running', 'completed', 'failed', 'stopped'
+    queued_at: Optional[datetime] = None
+    # Set when the run is admitted and starts executing
+    started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     node_statuses: Dict[str, str] = {}
     execution_logs: List[Dict[str, Any]] = []
     input_data: Optional[Dict[str, Any]] = None
     output_data: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
+    retry_of: Optional[str] = None
+    # Set by the run's last write, after its final logs; only sealed runs are cached as immutable
+    sealed: bool = False
+
+class BulkExecutionResponse(BaseModel):
+    workflow_id: str
+    execution_ids: List[str]
 
 class ExecutionResponse(BaseModel):
     id: str
     workflow_id: str
     status: str
-    started_at: datetime
+    queued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     node_statuses: Dict[str, str] = {}
     execution_logs: List[Dict[str, Any]] = []
     error_message: Optional[str] = None
+    retry_of: Optional[str] = None
 
 # =============================================================================
 # MODELS - Node System
@@ -204,55 +555,934 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        with trace_span("auth.jwt_decode"):
+            payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
     
-    user = await db.users.find_one({"id": user_id})
+    user = caches["users"].get(user_id)
     if user is None:
-        raise credentials_exception
+        with trace_span("auth.get_current_user"):
+            user = await db.users.find_one({"id": user_id})
+        if user is None:
+            raise credentials_exception
+        user = UserResponse(**user)
+        caches["users"].set(user_id, user)
+    
+    return user
+
+async def get_admin_user(current_user: UserResponse = Depends(get_current_user)):
+    """Require an authenticated admin user"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
+
+# =============================================================================
+# BLOB STORAGE
+# =============================================================================
+
+class GridFSBlobStore:
+    """Blob store backed by a GridFS bucket.
+    
+    Any object exposing the same ``put``/``open``/``update_metadata``/``delete_where`` coroutines
+    can be assigned to ``blob_store`` to keep payloads elsewhere.
+    """
+    
+    def __init__(self, database, bucket_name: str = "blobs"):
+        self.database = database
+        self.bucket_name = bucket_name
+        self.files = database[f"{bucket_name}.files"]
+    
+    @functools.cached_property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        """GridFS bucket, opened on first use so metadata-only calls work without it"""
+        return AsyncIOMotorGridFSBucket(self.database, bucket_name=self.bucket_name)
+    
+    async def put(self, data: bytes, metadata: Dict[str, Any]) -> str:
+        """Store bytes and return the blob id"""
+        blob_id = await self.bucket.upload_from_stream(metadata.get("kind", "payload"), data, metadata=metadata)
+        return str(blob_id)
+    
+    async def open(self, blob_id: str) -> AsyncIterator[bytes]:
+        """Yield the stored bytes chunk by chunk"""
+        grid_out = await self.bucket.open_download_stream(ObjectId(blob_id))
+        while True:
+            chunk = await grid_out.readchunk()
+            if not chunk:
+                break
+            yield chunk
+    
+    async def update_metadata(self, metadata_filter: Dict[str, Any], values: Dict[str, Any]):
+        """Set metadata fields on every blob whose metadata matches the filter"""
+        query = {f"metadata.{key}": value for key, value in metadata_filter.items()}
+        update = {f"metadata.{key}": value for key, value in values.items()}
+        await self.files.update_many(query, {"$set": update})
+    
+    async def delete_where(self, metadata_filter: Dict[str, Any]) -> int:
+        """Delete every blob whose metadata matches the filter"""
+        query = {f"metadata.{key}": value for key, value in metadata_filter.items()}
+        deleted = 0
+        async for blob in self.files.find(query, {"_id": 1}):
+            await self.bucket.delete(blob["_id"])
+            deleted += 1
+        return deleted
+
+blob_store = GridFSBlobStore(db)
+
+def is_blob_ref(value: Any) -> bool:
+    """Check whether a stored payload is a reference to blob storage"""
+    return isinstance(value, dict) and set(value) == {"_blob"}
+
+async def offload_payload(payload: Any, metadata: Dict[str, Any]) -> Any:
+    """Return the payload as it should be stored inline in a document.
+    
+    Payloads above ``PAYLOAD_INLINE_LIMIT`` are zlib-compressed into blob
+    storage and replaced with a ``{"_blob": {...}}`` reference.
+    """
+    if payload is None:
+        return None
+    
+    raw = json.dumps(payload, default=str).encode("utf-8")
+    if len(raw) <= PAYLOAD_INLINE_LIMIT:
+        return payload
+    
+    compressed = await asyncio.to_thread(zlib.compress, raw, 6)
+    blob_id = await blob_store.put(compressed, metadata)
+    return {"_blob": {"id": blob_id, "size": len(raw), "stored_size": len(compressed), "encoding": "zlib"}}
+
+async def stream_payload(value: Any) -> AsyncIterator[bytes]:
+    """Yield a stored payload as JSON bytes, decompressing blobs lazily"""
+    if not is_blob_ref(value):
+        yield json.dumps(value, default=str).encode("utf-8")
+        return
+    
+    decompressor = zlib.decompressobj()
+    async for chunk in blob_store.open(value["_blob"]["id"]):
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+async def load_payload(value: Any) -> Any:
+    """Resolve a stored payload to its full value"""
+    if not is_blob_ref(value):
+        return value
+    raw = b"".join([chunk async for chunk in stream_payload(value)])
+    return json.loads(raw)
+
+# =============================================================================
+# SHARED STATE (MULTI-WORKER)
+# =============================================================================
+
+class LocalEventBus:
+    """In-process publish/subscribe; the stand-in when no Redis is configured"""
+    
+    # Whether events reach other worker processes
+    shared = False
+    
+    def __init__(self):
+        self.subscribers: Dict[str, set] = {}
+    
+    def _dispatch(self, channel: str, message: Dict[str, Any]):
+        for queue in self.subscribers.get(channel, ()):
+            queue.put_nowait(message)
+    
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        self._dispatch(channel, message)
+    
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        """Yield a queue receiving the channel's messages while the context is open"""
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            self.subscribers[channel].discard(queue)
+            if not self.subscribers[channel]:
+                del self.subscribers[channel]
+    
+    async def start(self):
+        pass
+    
+    async def close(self):
+        pass
+
+class RedisEventBus(LocalEventBus):
+    """Publish/subscribe across workers through Redis.
+    
+    Each process holds one pattern subscription and dispatches messages to
+    its local subscribers, so waiting on a channel costs no extra connection.
+    """
+    
+    shared = True
+    
+    def __init__(self, url: str):
+        super().__init__()
+        self.redis = aioredis.from_url(url)
+        self.reader: Optional[asyncio.Task] = None
+    
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        await self.redis.publish(EVENT_CHANNEL_PREFIX + channel, json.dumps(message, default=str))
+    
+    async def start(self):
+        pubsub = self.redis.pubsub()
+        await pubsub.psubscribe(EVENT_CHANNEL_PREFIX + "*")
+        self.reader = asyncio.create_task(self._read(pubsub))
+    
+    async def _read(self, pubsub):
+        prefix_length = len(EVENT_CHANNEL_PREFIX)
+        while True:
+            try:
+                async for event in pubsub.listen():
+                    if event["type"] != "pmessage":
+                        continue
+                    channel = event["channel"].decode("utf-8")[prefix_length:]
+                    self._dispatch(channel, json.loads(event["data"]))
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                logger.error(f"Event bus connection lost: {str(e)}")
+                await asyncio.sleep(1)
+    
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        await self.redis.aclose()
+
+event_bus = RedisEventBus(REDIS_URL) if REDIS_URL else LocalEventBus()
+
+class TTLCache:
+    """Small per-process LRU cache whose entries expire after ``ttl`` seconds"""
     
-    return UserResponse(**user)
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "collections.OrderedDict[str, Any]" = collections.OrderedDict()
+    
+    def get(self, key: str) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+        # Least recently used entries are evicted first
+        self.entries.move_to_end(key)
+        return entry[1]
+    
+    def set(self, key: str, value: Any):
+        if self.ttl <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def invalidate(self, key: str):
+        self.entries.pop(key, None)
+
+caches: Dict[str, TTLCache] = {
+    "users": TTLCache(USER_CACHE_TTL if event_bus.shared else 0),
+}
+
+async def invalidate_cache(cache: str, key: str):
+    """Drop a cache entry in this worker and, through the event bus, in all others"""
+    caches[cache].invalidate(key)
+    await event_bus.publish("cache.invalidate", {"cache": cache, "key": key})
+
+async def run_cache_invalidation_listener():
+    """Apply cache invalidations published by any worker"""
+    async with event_bus.subscribe("cache.invalidate") as messages:
+        while True:
+            message = await messages.get()
+            if message.get("cache") in caches:
+                caches[message["cache"]].invalidate(message["key"])
+
+class LeaderLease:
+    """Time-limited lease in MongoDB held by at most one worker at a time"""
+    
+    def __init__(self, database, name: str, ttl: float = LEADER_LEASE_SECONDS):
+        self.collection = database.leases
+        self.name = name
+        self.ttl = ttl
+    
+    async def acquire(self) -> bool:
+        """Take or renew the lease; returns whether this worker holds it"""
+        now = datetime.utcnow()
+        try:
+            lease = await self.collection.find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": WORKER_ID}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"owner": WORKER_ID, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            return False
+        return lease is not None and lease["owner"] == WORKER_ID
+    
+    async def release(self):
+        await self.collection.delete_one({"_id": self.name, "owner": WORKER_ID})
+
+# =============================================================================
+# EXECUTION STORAGE
+# =============================================================================
+
+FINISHED_EXECUTION_STATUSES = ["completed", "failed", "stopped"]
+
+# Upper bounds (ms) of the duration histogram kept in execution statistics
+EXECUTION_DURATION_BUCKETS = [100, 500, 1000, 5000, 10000, 30000, 60000, 300000]
+
+def execution_duration_bucket(duration_ms: float) -> str:
+    """Histogram bucket name for a run duration, e.g. ``le_1000`` or ``le_inf``"""
+    for bound in EXECUTION_DURATION_BUCKETS:
+        if duration_ms <= bound:
+            return f"le_{bound}"
+    return "le_inf"
+
+def _apply_fields(document: Dict[str, Any], fields: Dict[str, Any]):
+    """Apply ``$set``-style fields, including dotted paths, to a document"""
+    for key, value in fields.items():
+        target = document
+        *parents, leaf = key.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+
+class ExecutionStore(abc.ABC):
+    """Persistence used by the execution engine.
+    
+    Subclasses implement the write and read methods; waiting for a run to
+    finish defaults to polling ``get_execution``.
+    """
+    
+    @abc.abstractmethod
+    async def insert_executions(self, executions: List[Dict[str, Any]]):
+        """Store new executions"""
+    
+    @abc.abstractmethod
+    async def update_execution(self, execution_id: str, fields: Dict[str, Any]):
+        """Set ``$set``-style fields, including dotted paths, on an execution"""
+    
+    async def set_node_status(self, execution_id: str, node_id: str, status: str):
+        await self.update_execution(execution_id, {f"node_statuses.{node_id}": status})
+    
+    @abc.abstractmethod
+    async def append_log(self, execution_id: str, log_entry: Dict[str, Any]):
+        """Append an entry to an execution's log"""
+    
+    @abc.abstractmethod
+    async def get_execution(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """An execution by id, or ``None``"""
+    
+    async def prepare_payload(self, payload: Any, metadata: Dict[str, Any]) -> Any:
+        """Return the form in which an input/output payload should be stored"""
+        return payload
+    
+    async def save_checkpoint(self, execution_id: str, step: int, checkpoint: Dict[str, Any]):
+        """Keep a step's ``{"node_id", "items"}`` for retries; here on the execution itself"""
+        await self.update_execution(execution_id, {f"checkpoints.{step}": checkpoint})
+    
+    async def get_checkpoints(self, execution_id: str) -> Dict[int, Dict[str, Any]]:
+        """An execution's checkpoints by step"""
+        execution = await self.get_execution(execution_id) or {}
+        return {int(step): checkpoint for step, checkpoint in (execution.get("checkpoints") or {}).items()}
+    
+    async def record_run_stats(self, workflow_id: str, status: str, started_at: datetime,
+                               finished_at: datetime, failed_node_id: Optional[str] = None):
+        """Fold a finished run into the workflow's statistics; stores without rollups ignore it"""
+    
+    async def run_saved(self, workflow_id: str, queued_at: datetime):
+        """Called once a finished run's execution and statistics are written"""
+    
+    async def wait_until_finished(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Wait for an execution written by another process to finish.
+        
+        An execution not stored yet, such as a run saved only when it ends, is
+        waited for too; the caller's timeout bounds the wait.
+        """
+        delay = 0.05
+        while True:
+            execution = await self.get_execution(execution_id)
+            if execution is not None and execution["status"] in FINISHED_EXECUTION_STATUSES:
+                return execution
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+class MongoExecutionStore(ExecutionStore):
+    """Executions stored in the ``executions`` collection"""
+    
+    def __init__(self, database):
+        self.collection = database.executions
+        self.checkpoints = database.execution_checkpoints
+        self.stats = database.execution_stats
+    
+    async def record_run_stats(self, workflow_id: str, status: str, started_at: datetime,
+                               finished_at: datetime, failed_node_id: Optional[str] = None):
+        """Increment the workflow's rollup for the day the run finished"""
+        day = finished_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        duration_ms = (finished_at - started_at).total_seconds() * 1000
+        increments = {
+            f"counts.{status}": 1,
+            "duration_ms_sum": duration_ms,
+            f"duration_histogram.{execution_duration_bucket(duration_ms)}": 1,
+        }
+        if failed_node_id:
+            increments[f"node_failures.{failed_node_id}"] = 1
+        await self.stats.update_one(
+            {"_id": f"{workflow_id}:{day.strftime('%Y-%m-%d')}"},
+            {
+                "$inc": increments,
+                "$max": {"duration_ms_max": duration_ms},
+                "$setOnInsert": {"workflow_id": workflow_id, "day": day},
+            },
+            upsert=True
+        )
+    
+    async def run_saved(self, workflow_id: str, queued_at: datetime):
+        """Purge again what the run wrote if its workflow was deleted meanwhile"""
+        await requeue_workflow_purge(workflow_id, queued_at)
+    
+    async def insert_executions(self, executions: List[Dict[str, Any]]):
+        if len(executions) == 1:
+            await self.collection.insert_one(executions[0])
+        else:
+            await self.collection.insert_many(executions)
+    
+    async def update_execution(self, execution_id: str, fields: Dict[str, Any]):
+        await self.collection.update_one({"id": execution_id}, {"$set": fields})
+        if "expires_at" in fields:
+            # Checkpoints and offloaded payloads expire with their execution
+            await self.checkpoints.update_many(
+                {"execution_id": execution_id}, {"$set": {"expires_at": fields["expires_at"]}}
+            )
+            await blob_store.update_metadata({"execution_id": execution_id}, {"expires_at": fields["expires_at"]})
+    
+    async def append_log(self, execution_id: str, log_entry: Dict[str, Any]):
+        await self.collection.update_one({"id": execution_id}, {"$push": {"execution_logs": log_entry}})
+    
+    async def get_execution(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": execution_id}, {"_id": 0})
+    
+    async def prepare_payload(self, payload: Any, metadata: Dict[str, Any]) -> Any:
+        return await offload_payload(payload, metadata)
+    
+    async def save_checkpoint(self, execution_id: str, step: int, checkpoint: Dict[str, Any]):
+        """Store a checkpoint as its own document so executions stay small"""
+        items = await self.prepare_payload(
+            checkpoint["items"], {"kind": "checkpoint", "execution_id": execution_id, "node_id": checkpoint["node_id"]}
+        )
+        await self.checkpoints.replace_one(
+            {"execution_id": execution_id, "step": step},
+            {"execution_id": execution_id, "step": step, "node_id": checkpoint["node_id"], "items": items},
+            upsert=True
+        )
+    
+    async def get_checkpoints(self, execution_id: str) -> Dict[int, Dict[str, Any]]:
+        checkpoints = {
+            document["step"]: {"node_id": document["node_id"], "items": document["items"]}
+            async for document in self.checkpoints.find({"execution_id": execution_id}, {"_id": 0})
+        }
+        # Executions stored before checkpoints had their own collection keep them inline
+        return checkpoints or await super().get_checkpoints(execution_id)
+    
+    async def wait_until_finished(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Follow the execution through a change stream, or poll without a replica set"""
+        try:
+            pipeline = [{"$match": {"fullDocument.id": execution_id}}]
+            async with self.collection.watch(pipeline, full_document="updateLookup") as stream:
+                # Check after opening the stream so a finish in between is not missed
+                execution = await self.get_execution(execution_id)
+                if execution is not None and execution["status"] in FINISHED_EXECUTION_STATUSES:
+                    return execution
+                # Runs saved only when they end arrive as an insert
+                async for change in stream:
+                    execution = change.get("fullDocument") or {}
+                    if execution.get("status") in FINISHED_EXECUTION_STATUSES:
+                        execution.pop("_id", None)
+                        return execution
+        except OperationFailure:
+            # Change streams need a replica set
+            pass
+        return await super().wait_until_finished(execution_id)
+
+class InMemoryExecutionStore(ExecutionStore):
+    """Executions kept in process memory.
+    
+    Used for tests, benchmarks and runs that never need to be read back from
+    the database. Only the most recent ``max_finished`` finished executions
+    are retained.
+    """
+    
+    def __init__(self, max_finished: int = EXECUTION_MEMORY_LIMIT):
+        self.executions: Dict[str, Dict[str, Any]] = {}
+        self.finished: "collections.OrderedDict[str, None]" = collections.OrderedDict()
+        self.max_finished = max_finished
+    
+    async def insert_executions(self, executions: List[Dict[str, Any]]):
+        for execution in executions:
+            self.executions[execution["id"]] = dict(execution)
+    
+    async def update_execution(self, execution_id: str, fields: Dict[str, Any]):
+        execution = self.executions.get(execution_id)
+        if execution is None:
+            return
+        _apply_fields(execution, fields)
+        if fields.get("status") in FINISHED_EXECUTION_STATUSES:
+            self.finished[execution_id] = None
+            while len(self.finished) > self.max_finished:
+                expired_id, _ = self.finished.popitem(last=False)
+                self.executions.pop(expired_id, None)
+    
+    async def append_log(self, execution_id: str, log_entry: Dict[str, Any]):
+        execution = self.executions.get(execution_id)
+        if execution is not None:
+            execution.setdefault("execution_logs", []).append(log_entry)
+    
+    async def get_execution(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        execution = self.executions.get(execution_id)
+        return dict(execution) if execution is not None else None
+
+def replay_execution_journal(path: Path, execution_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Rebuild executions from a FileExecutionStore journal (blocking)"""
+    executions: Dict[str, Dict[str, Any]] = {}
+    if not path.exists():
+        return executions
+    with open(path, encoding="utf-8") as journal:
+        for line in journal:
+            if execution_id is not None and execution_id not in line:
+                continue
+            record = json_util.loads(line)
+            if record["op"] == "insert":
+                executions[record["id"]] = record["execution"]
+            elif record["id"] in executions:
+                if record["op"] == "set":
+                    _apply_fields(executions[record["id"]], record["fields"])
+                elif record["op"] == "log":
+                    executions[record["id"]].setdefault("execution_logs", []).append(record["entry"])
+    return executions
+
+class FileExecutionStore(InMemoryExecutionStore):
+    """Append-only JSONL journal of execution writes on local disk.
+    
+    Writes are queued in memory and written to the file from a worker thread
+    when an execution finishes or ``flush_records`` accumulate; recent
+    executions are also served from memory. Older ones are rebuilt with
+    ``replay_execution_journal``.
+    """
+    
+    def __init__(self, path: str, max_finished: int = 1000, flush_records: int = 1000):
+        super().__init__(max_finished=max_finished)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.journal = open(self.path, "a", encoding="utf-8", buffering=1 << 16)
+        self.flush_records = flush_records
+        self.pending: List[str] = []
+        # Keeps threaded writes in journal order
+        self.write_lock = asyncio.Lock()
+    
+    def _write(self, lines: List[str]):
+        self.journal.writelines(lines)
+        self.journal.flush()
+    
+    async def _append(self, record: Dict[str, Any], flush: bool = False):
+        self.pending.append(json_util.dumps(record) + "\n")
+        if flush or len(self.pending) >= self.flush_records:
+            await self.flush()
+    
+    async def flush(self):
+        """Write queued journal records to disk"""
+        async with self.write_lock:
+            lines, self.pending = self.pending, []
+            if lines:
+                await asyncio.to_thread(self._write, lines)
+    
+    async def insert_executions(self, executions: List[Dict[str, Any]]):
+        await super().insert_executions(executions)
+        for execution in executions:
+            await self._append(
+                {"op": "insert", "id": execution["id"], "execution": execution}, flush=bool(execution.get("sealed"))
+            )
+    
+    async def update_execution(self, execution_id: str, fields: Dict[str, Any]):
+        await super().update_execution(execution_id, fields)
+        await self._append(
+            {"op": "set", "id": execution_id, "fields": fields},
+            flush=bool(fields.get("sealed"))
+        )
+    
+    async def append_log(self, execution_id: str, log_entry: Dict[str, Any]):
+        await super().append_log(execution_id, log_entry)
+        await self._append({"op": "log", "id": execution_id, "entry": log_entry})
+    
+    async def get_execution(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        execution = await super().get_execution(execution_id)
+        if execution is None:
+            await self.flush()
+            execution = (await asyncio.to_thread(replay_execution_journal, self.path, execution_id)).get(execution_id)
+        return execution
+
+def create_execution_store() -> ExecutionStore:
+    """Execution store selected by ``EXECUTION_STORE``"""
+    if EXECUTION_STORE == "memory":
+        return InMemoryExecutionStore()
+    if EXECUTION_STORE == "file":
+        return FileExecutionStore(EXECUTION_STORE_PATH)
+    return MongoExecutionStore(db)
+
+# =============================================================================
+# NODE RESULT CACHE
+# =============================================================================
+
+# Node types whose output depends only on their config and input items; cached unless
+# ``config.cache`` is false. Other nodes, such as HTTP GETs whose answer changes over
+# time, are cached only when ``config.cache`` opts in.
+CACHEABLE_NODE_TYPES = {"set", "if", "filter", "merge"}
+
+def is_cacheable_node(node: WorkflowNode) -> bool:
+    """Whether a node's result may be reused; ``config.cache`` overrides the type's default"""
+    explicit = node.data.config.get("cache")
+    if explicit is not None:
+        return bool(explicit)
+    return node.type in CACHEABLE_NODE_TYPES
+
+def node_cache_key(node: WorkflowNode, items: List[Dict[str, Any]]) -> str:
+    """Content address of a node run: hash of its type, config and input items"""
+    content = json.dumps([node.type, node.data.config, items], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+class NodeResultCache:
+    """Node outputs by content address: a per-worker LRU tier and an optional Redis tier.
+    
+    Entries are stored as JSON so every hit hands out a fresh copy that a
+    downstream node may modify freely.
+    """
+    
+    def __init__(self, max_size: int = NODE_CACHE_SIZE, ttl: float = NODE_CACHE_TTL,
+                 redis_url: Optional[str] = None):
+        self.local = TTLCache(ttl, max_size)
+        self.shared = aioredis.from_url(redis_url) if redis_url else None
+    
+    @property
+    def enabled(self) -> bool:
+        return self.local.max_size > 0 and self.local.ttl > 0
+    
+    async def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        encoded = self.local.get(key)
+        if encoded is None and self.shared is not None:
+            try:
+                encoded = await self.shared.get(f"{EVENT_CHANNEL_PREFIX}node-cache:{key}")
+            except Exception as e:
+                logger.warning(f"Shared node cache read failed: {str(e)}")
+            if encoded is not None:
+                self.local.set(key, encoded)
+        return None if encoded is None else json.loads(encoded)
+    
+    async def set(self, key: str, items: List[Dict[str, Any]]):
+        encoded = json.dumps(items, default=str)
+        self.local.set(key, encoded)
+        if self.shared is not None:
+            try:
+                await self.shared.set(f"{EVENT_CHANNEL_PREFIX}node-cache:{key}", encoded,
+                                      ex=max(1, int(self.local.ttl)))
+            except Exception as e:
+                logger.warning(f"Shared node cache write failed: {str(e)}")
+
+node_cache = NodeResultCache(redis_url=REDIS_URL if NODE_CACHE_SHARED else None)
 
 # =============================================================================
 # WORKFLOW EXECUTION ENGINE
 # =============================================================================
 
+async def simulate_node_execution(node: WorkflowNode, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Default node executor: simulated work that passes its input items through"""
+    # Simulate node execution
+    await asyncio.sleep(1 + (hash(node.id) % 3))  # 1-4 second delay
+    
+    # Simulate 95% success rate
+    if hash(node.id) % 20 == 0:  # 5% failure rate
+        raise Exception(f"Simulated execution failure in node {node.data.label}")
+    
+    return items
+
+class BatchNodeError(Exception):
+    """A node run by a split-in-batches node failed; ``node_id`` is that node"""
+    
+    def __init__(self, message: str, node_id: str):
+        super().__init__(message)
+        self.node_id = node_id
+
+def _iter_batches(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield consecutive slices of at most ``size`` items without copying the whole input"""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class AdmissionQueue:
+    """Stride-scheduled admission: priority classes share capacity by weight, then each class's users equally"""
+    
+    def __init__(self, max_running: int = ENGINE_MAX_CONCURRENCY,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_running = max_running
+        self.weights = weights or EXECUTION_PRIORITY_WEIGHTS
+        self.running = 0
+        self.sequence = itertools.count()
+        # Waiting runs per (priority, user) flow, and each flow's pass within its class
+        self.flows: Dict[Tuple[str, str], collections.deque] = {}
+        self.user_passes: Dict[Tuple[str, str], float] = {}
+        # Per class: heap of (pass, sequence, user) for users with waiting runs, and the class's virtual time
+        self.users_ready: Dict[str, List[Tuple[float, int, str]]] = {}
+        self.class_time: Dict[str, float] = {}
+        # Heap of (pass, sequence, priority) for classes with waiting runs
+        self.class_passes: Dict[str, float] = {}
+        self.classes_ready: List[Tuple[float, int, str]] = []
+        self.virtual_time = 0.0
+    
+    def submit(self, priority: str, user_id: str, start):
+        """Queue ``start()``, a callable that launches the run, and admit what fits"""
+        flow = (priority, user_id)
+        queue = self.flows.get(flow)
+        if queue is None:
+            queue = self.flows[flow] = collections.deque()
+        if not queue:
+            # Idle users and classes start at the current virtual time instead of banking credit
+            users = self.users_ready.setdefault(priority, [])
+            if not users:
+                self.class_passes[priority] = max(self.class_passes.get(priority, 0.0), self.virtual_time)
+                heapq.heappush(self.classes_ready, (self.class_passes[priority], next(self.sequence), priority))
+            self.user_passes[flow] = max(self.user_passes.get(flow, 0.0), self.class_time.get(priority, 0.0))
+            heapq.heappush(users, (self.user_passes[flow], next(self.sequence), user_id))
+        queue.append((time.perf_counter(), start))
+        ENGINE_QUEUE_DEPTH.inc()
+        self._admit()
+    
+    def release(self):
+        """Free a running slot and admit the next waiting run"""
+        self.running -= 1
+        self._admit()
+    
+    def _next_flow(self) -> Tuple[str, str]:
+        """Pick the class furthest behind, then its user furthest behind, and advance both"""
+        class_pass, _, priority = heapq.heappop(self.classes_ready)
+        self.virtual_time = class_pass
+        self.class_passes[priority] = class_pass + 1.0 / self.weights.get(priority, 1.0)
+        
+        users = self.users_ready[priority]
+        user_pass, _, user_id = heapq.heappop(users)
+        self.class_time[priority] = user_pass
+        flow = (priority, user_id)
+        self.user_passes[flow] = user_pass + 1.0
+        
+        if len(self.flows[flow]) > 1:
+            heapq.heappush(users, (self.user_passes[flow], next(self.sequence), user_id))
+        else:
+            del self.user_passes[flow]
+        if users:
+            heapq.heappush(self.classes_ready, (self.class_passes[priority], next(self.sequence), priority))
+        else:
+            del self.users_ready[priority]
+            del self.class_passes[priority]
+        return flow
+    
+    def _admit(self):
+        while self.classes_ready and (self.max_running <= 0 or self.running < self.max_running):
+            flow = self._next_flow()
+            queue = self.flows[flow]
+            enqueued_at, start = queue.popleft()
+            if not queue:
+                del self.flows[flow]
+            
+            ENGINE_QUEUE_DEPTH.dec()
+            EXECUTION_QUEUE_WAIT.labels(flow[0]).observe(time.perf_counter() - enqueued_at)
+            self.running += 1
+            try:
+                start()
+            except Exception:
+                self.running -= 1
+                logger.exception("Starting an admitted execution failed")
+
 class WorkflowExecutionEngine:
-    def __init__(self):
+    def __init__(self, node_executor=None, store: Optional[ExecutionStore] = None,
+                 cache: Optional[NodeResultCache] = None):
+        # Coroutine (node, items) -> output items that performs a node's work
+        self.node_executor = node_executor or simulate_node_execution
+        self.store = store or MongoExecutionStore(db)
+        self.cache = cache or node_cache
+        self.admission = AdmissionQueue()
+        # execution_id -> id of the node whose failure ended the run
+        self.failed_nodes: Dict[str, str] = {}
+        # node_id -> recent successful call latencies of nodes that hedge
+        self.node_latencies: Dict[str, collections.deque] = {}
+        # execution_id -> node cache hit/miss counts of the running execution
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
         self.executing_workflows = {}
+        # execution_id -> future resolved with the final status/output of the run
+        self.completion_futures: Dict[str, asyncio.Future] = {}
+        # execution_id -> node outputs by step, restored instead of re-run by a retry
+        self.resume_checkpoints: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        # Runs whose save policy is not "all" write here until they finish
+        self.unsaved = InMemoryExecutionStore(max_finished=sys.maxsize)
+        self.save_policies: Dict[str, str] = {}
     
-    async def execute_workflow(self, workflow: WorkflowResponse, user_id: str, input_data: Optional[Dict] = None):
+    async def execute_workflow(self, workflow: WorkflowResponse, user_id: str, input_data: Optional[Dict] = None,
+                               save_policy: Optional[str] = None, priority: str = "interactive"):
         """Execute a workflow and track its progress"""
+        save_policy = self._resolve_save_policy(workflow, save_policy)
+        execution, execution_doc = await self._new_execution(workflow, input_data, save_policy)
+        
+        await self._store_for_policy(save_policy).insert_executions([execution_doc])
+        
+        self._start_execution(execution, workflow, save_policy, user_id, priority)
+        
+        return execution
+    
+    async def execute_workflow_batch(self, workflow: WorkflowResponse, user_id: str,
+                                     inputs: List[Optional[Dict]],
+                                     save_policy: Optional[str] = None,
+                                     priority: str = "batch") -> List[WorkflowExecution]:
+        """Execute a workflow once per input payload.
+        
+        All execution records are written with a single ``insert_many`` before
+        any run starts. Executions are returned in input order.
+        """
+        save_policy = self._resolve_save_policy(workflow, save_policy)
+        prepared = [await self._new_execution(workflow, input_data, save_policy) for input_data in inputs]
+        if not prepared:
+            return []
+        
+        await self._store_for_policy(save_policy).insert_executions([execution_doc for _, execution_doc in prepared])
+        
+        for execution, _ in prepared:
+            self._start_execution(execution, workflow, save_policy, user_id, priority)
+        
+        return [execution for execution, _ in prepared]
+    
+    def _resolve_save_policy(self, workflow: WorkflowResponse, save_policy: Optional[str]) -> str:
+        """Request policy, else the workflow's, else the global default"""
+        return save_policy or workflow.save_policy or EXECUTION_SAVE_POLICY
+    
+    def _store_for_policy(self, save_policy: str) -> ExecutionStore:
+        return self.store if save_policy == "all" else self.unsaved
+    
+    def _store_for(self, execution_id: str) -> ExecutionStore:
+        """Store that receives an execution's intermediate writes"""
+        return self.unsaved if execution_id in self.save_policies else self.store
+    
+    async def retry_execution(self, failed: Dict[str, Any], workflow: WorkflowResponse,
+                              save_policy: Optional[str] = None) -> WorkflowExecution:
+        """Start a new run of a failed execution that resumes at the point of failure.
+        
+        Steps checkpointed by the failed run reuse their stored output; the
+        failed node and everything after it execute again.
+        """
+        save_policy = self._resolve_save_policy(workflow, save_policy)
+        input_data = await load_payload(failed.get("input_data"))
+        execution, execution_doc = await self._new_execution(workflow, input_data, save_policy, retry_of=failed["id"])
+        
+        await self._store_for_policy(save_policy).insert_executions([execution_doc])
+        
+        self.resume_checkpoints[execution.id] = await self.store.get_checkpoints(failed["id"])
+        self._start_execution(execution, workflow, save_policy, workflow.created_by, "interactive")
+        
+        return execution
+    
+    async def _new_execution(self, workflow: WorkflowResponse, input_data: Optional[Dict], save_policy: str = "all",
+                             retry_of: Optional[str] = None):
+        """Build an execution and the document to store for it"""
         execution_id = str(uuid.uuid4())
         
         # Create execution record
         execution = WorkflowExecution(
             id=execution_id,
             workflow_id=workflow.id,
-            status="running",
-            started_at=datetime.utcnow(),
+            status="queued",
+            queued_at=datetime.utcnow(),
             node_statuses={},
             execution_logs=[],
-            input_data=input_data or {}
+            input_data=input_data or {},
+            retry_of=retry_of
+        )
+        
+        # Keep large input payloads out of the document
+        execution_doc = execution.dict()
+        execution_doc["input_data"] = await self._store_for_policy(save_policy).prepare_payload(
+            execution.input_data,
+            {"kind": "input_data", "execution_id": execution_id, "workflow_id": workflow.id}
         )
         
-        # Store in database
-        await db.executions.insert_one(execution.dict())
+        return execution, execution_doc
+    
+    def _start_execution(self, execution: WorkflowExecution, workflow: WorkflowResponse, save_policy: str = "all",
+                         user_id: str = "", priority: str = "interactive"):
+        """Queue a stored execution to run in the background once admitted"""
+        # Register the completion future before the run can start so waiters never miss it
+        self.completion_futures[execution.id] = asyncio.get_running_loop().create_future()
+        if save_policy != "all":
+            self.save_policies[execution.id] = save_policy
         
-        # Start background execution
-        asyncio.create_task(self._execute_workflow_background(execution, workflow))
+        def start():
+            task = asyncio.create_task(self._execute_workflow_background(execution, workflow))
+            task.add_done_callback(lambda _: self.admission.release())
+            self.executing_workflows[execution.id] = task
         
+        self.admission.submit(priority, user_id, start)
+    
+    async def get_local_execution(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """An execution that is not in MongoDB: an unsaved run in progress, or one
+        kept by a non-Mongo store"""
+        execution = await self.unsaved.get_execution(execution_id)
+        if execution is None and not isinstance(self.store, MongoExecutionStore):
+            execution = await self.store.get_execution(execution_id)
         return execution
     
+    async def _save_finished_execution(self, execution_id: str):
+        """Persist what the save policy keeps of a finished run, then drop its buffer"""
+        save_policy = self.save_policies.pop(execution_id, None)
+        if save_policy is None:
+            return
+        execution = self.unsaved.executions.pop(execution_id, None)
+        self.unsaved.finished.pop(execution_id, None)
+        if execution is None or save_policy == "none":
+            return
+        if save_policy == "errors" and execution["status"] != "failed":
+            return
+        
+        checkpoints = execution.pop("checkpoints", None) or {}
+        if save_policy == "summary":
+            execution.update({"execution_logs": [], "input_data": None, "output_data": None})
+            checkpoints = {}
+        else:
+            execution["input_data"] = await self.store.prepare_payload(
+                execution.get("input_data"),
+                {"kind": "input_data", "execution_id": execution_id, "workflow_id": execution["workflow_id"]}
+            )
+        await self.store.insert_executions([execution])
+        for step, checkpoint in checkpoints.items():
+            await self.store.save_checkpoint(execution_id, int(step), checkpoint)
+        if execution.get("expires_at"):
+            # Lets the store expire checkpoints and offloaded payloads with the execution
+            await self.store.update_execution(execution_id, {"expires_at": execution["expires_at"]})
+    
     async def _execute_workflow_background(self, execution: WorkflowExecution, workflow: WorkflowResponse):
         """Background workflow execution"""
+        ENGINE_IN_FLIGHT.inc()
+        result = {"status": "failed", "output_data": None, "error_message": None}
         try:
-            # Update execution status
-            await self._update_execution_status(execution.id, "running")
+            # The run leaves the admission queue; its duration counts from here
+            execution.started_at = datetime.utcnow()
+            await self._store_for(execution.id).update_execution(execution.id, {
+                "status": "running", "started_at": execution.started_at, "updated_at": execution.started_at
+            })
             await self._add_execution_log(execution.id, "info", "Workflow", "Starting workflow execution")
             
             # Find trigger nodes
@@ -261,75 +1491,462 @@ class WorkflowExecutionEngine:
             if not trigger_nodes:
                 raise Exception("No trigger nodes found in workflow")
             
-            # Execute trigger nodes
+            # Execute trigger nodes, keeping the output of the last node that ran
+            adjacency = self._build_adjacency(workflow)
+            trigger_items = [{"json": execution.input_data or {}}]
+            checkpoints = self.resume_checkpoints.pop(execution.id, {})
+            steps = itertools.count()
+            last_output = None
             for trigger_node in trigger_nodes:
-                await self._execute_node_chain(execution.id, trigger_node, workflow)
+                last_output = await self._execute_node_chain(
+                    execution.id, trigger_node, adjacency, trigger_items, steps, checkpoints
+                )
             
             # Mark as completed
-            await self._update_execution_status(execution.id, "completed")
+            result = {"status": "completed", "output_data": last_output, "error_message": None}
+            await self._update_execution_status(
+                execution.id, "completed", workflow=workflow,
+                output_data=await self._store_for(execution.id).prepare_payload(
+                    last_output,
+                    {"kind": "output_data", "execution_id": execution.id, "workflow_id": workflow.id}
+                )
+            )
             await self._add_execution_log(execution.id, "success", "Workflow", "Workflow execution completed successfully")
             
         except Exception as e:
-            await self._update_execution_status(execution.id, "failed", str(e))
+            result = {"status": "failed", "output_data": None, "error_message": str(e)}
+            await self._update_execution_status(execution.id, "failed", str(e), workflow=workflow)
             await self._add_execution_log(execution.id, "error", "Workflow", f"Workflow execution failed: {str(e)}")
+        finally:
+            self.resume_checkpoints.pop(execution.id, None)
+            cache_stats = self.cache_stats.pop(execution.id, None)
+            if cache_stats:
+                try:
+                    await self._add_execution_log(
+                        execution.id, "info", "Workflow",
+                        f"Node cache: {cache_stats['hit']} hits, {cache_stats['miss']} misses"
+                    )
+                except Exception as e:
+                    logger.error(f"Logging cache stats for execution {execution.id} failed: {str(e)}")
+            try:
+                await self._store_for(execution.id).update_execution(execution.id, {"sealed": True})
+            except Exception as e:
+                logger.error(f"Sealing execution {execution.id} failed: {str(e)}")
+            ENGINE_IN_FLIGHT.dec()
+            EXECUTIONS_TOTAL.labels(result["status"]).inc()
+            self.executing_workflows.pop(execution.id, None)
+            future = self.completion_futures.pop(execution.id, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+            failed_node_id = self.failed_nodes.pop(execution.id, None)
+            try:
+                await self.store.record_run_stats(
+                    workflow.id, result["status"], execution.started_at, datetime.utcnow(), failed_node_id
+                )
+            except Exception as e:
+                logger.error(f"Recording statistics of execution {execution.id} failed: {str(e)}")
+            try:
+                await self._save_finished_execution(execution.id)
+                if event_bus.shared:
+                    await event_bus.publish(f"execution.{execution.id}.finished", {
+                        "status": result["status"], "error_message": result["error_message"]
+                    })
+            except Exception as e:
+                logger.error(f"Saving execution {execution.id} failed: {str(e)}")
+            try:
+                await self.store.run_saved(workflow.id, execution.queued_at or execution.started_at)
+            except Exception as e:
+                logger.error(f"Checking deletion of workflow {workflow.id} failed: {str(e)}")
     
-    async def _execute_node_chain(self, execution_id: str, node: WorkflowNode, workflow: WorkflowResponse):
-        """Execute a chain of nodes starting from the given node"""
-        try:
-            # Update node status
-            await self._update_node_status(execution_id, node.id, "executing")
-            await self._add_execution_log(execution_id, "info", node.data.label, "Starting node execution")
+    async def _execute_node_chain(self, execution_id: str, node: WorkflowNode,
+                                  adjacency: Dict[str, List[WorkflowNode]],
+                                  items: List[Dict[str, Any]],
+                                  steps: Optional[Iterator[int]] = None,
+                                  checkpoints: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Execute a chain of nodes starting from the given node.
+        
+        Nodes run depth-first in the order of ``workflow.nodes``; an explicit
+        stack keeps long chains clear of the recursion limit. Each node run is
+        a numbered step whose output is checkpointed; a step found in
+        ``checkpoints`` for the same node is restored instead of executed.
+        Returns the output of the last node executed as
+        ``{"node_id": ..., "node": ..., "items": [...]}``.
+        """
+        steps = steps if steps is not None else itertools.count()
+        checkpoints = checkpoints or {}
+        last_output = None
+        stack = [(node, items)]
+        while stack:
+            current, current_items = stack.pop()
+            step = next(steps)
+            checkpoint = checkpoints.get(step)
+            if checkpoint is not None and checkpoint["node_id"] == current.id:
+                output_items = await self._restore_node(execution_id, step, current, checkpoint)
+            elif self._is_batch_node(current):
+                output_items = await self._execute_batch_node(execution_id, step, current, adjacency, current_items)
+            else:
+                output_items = await self._execute_node(execution_id, current, current_items, step)
+            last_output = {"node_id": current.id, "node": current.data.label, "items": output_items}
             
-            # Simulate node execution
-            await asyncio.sleep(1 + (hash(node.id) % 3))  # 1-4 second delay
+            # A batch node has already run its downstream nodes, once per batch
+            if self._is_batch_node(current):
+                continue
+            
+            # Connected nodes are pushed in reverse so the first one runs next
+            for connected_node in reversed(adjacency.get(current.id, [])):
+                stack.append((connected_node, output_items))
+        
+        return last_output
+    
+    async def _checkpoint_node(self, execution_id: str, step: int, node: WorkflowNode,
+                               output_items: List[Dict[str, Any]]):
+        """Checkpoint a node's output, then mark the node successful"""
+        store = self._store_for(execution_id)
+        await store.save_checkpoint(execution_id, step, {"node_id": node.id, "items": output_items})
+        await store.set_node_status(execution_id, node.id, "success")
+    
+    async def _restore_node(self, execution_id: str, step: int, node: WorkflowNode,
+                            checkpoint: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Reuse a node's checkpointed output from the run being retried"""
+        output_items = await load_payload(checkpoint["items"])
+        await self._checkpoint_node(execution_id, step, node, output_items)
+        await self._add_execution_log(execution_id, "success", node.data.label, "Node output restored from checkpoint")
+        return output_items
+    
+    async def _execute_batch_node(self, execution_id: str, step: int, node: WorkflowNode,
+                                  adjacency: Dict[str, List[WorkflowNode]],
+                                  items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run a split-in-batches node: its downstream nodes once per batch of items.
+        
+        Up to ``config.concurrency`` batches are in flight at a time. Batches
+        are cut from the input lazily and their results dropped once done, so
+        beyond its input, which is the upstream node's output and held like
+        any node output, the node only keeps the active batches in memory.
+        Per-batch node runs are not logged or checkpointed individually; a
+        failure is attributed to the downstream node that raised it.
+        
+        Returns the output of the last downstream node for the last batch of
+        the input (not the concatenation of all batches).
+        """
+        config = node.data.config
+        batch_size = max(1, int(config.get("batchSize", 100)))
+        concurrency = max(1, int(config.get("concurrency", 1)))
+        
+        await self._update_node_status(execution_id, node.id, "executing")
+        await self._add_execution_log(
+            execution_id, "info", node.data.label,
+            f"Processing items in batches of {batch_size}, {concurrency} at a time"
+        )
+        try:
+            output_items, batches, item_count = await self._map_batches(
+                execution_id, node, adjacency, items, batch_size, concurrency
+            )
+        except BatchNodeError as e:
+            self.failed_nodes[execution_id] = e.node_id
+            await self._store_for(execution_id).update_execution(
+                execution_id, {f"node_statuses.{node.id}": "error", f"node_statuses.{e.node_id}": "error"}
+            )
+            await self._add_execution_log(execution_id, "error", node.data.label, f"Batch processing failed: {str(e)}")
+            raise
+        
+        downstream = self._downstream_node_ids(node, adjacency)
+        if downstream:
+            await self._store_for(execution_id).update_execution(
+                execution_id, {f"node_statuses.{node_id}": "success" for node_id in downstream}
+            )
+        await self._checkpoint_node(execution_id, step, node, output_items)
+        await self._add_execution_log(
+            execution_id, "success", node.data.label, f"Processed {item_count} items in {batches} batches"
+        )
+        return output_items
+    
+    async def _map_batches(self, execution_id: str, node: WorkflowNode,
+                           adjacency: Dict[str, List[WorkflowNode]], items: Iterable[Dict[str, Any]],
+                           batch_size: int, concurrency: int):
+        """Feed batches of items through the node's downstream nodes with bounded concurrency.
+        
+        Raises ``BatchNodeError`` naming the downstream node of the first failing batch.
+        """
+        batches = enumerate(_iter_batches(items, batch_size))
+        children = adjacency.get(node.id, [])
+        progress = {"batches": 0, "items": 0, "last_index": -1, "last_items": []}
+        
+        async def worker():
+            # Workers share one lazy iterator, so each batch is cut just before it runs
+            for index, batch in batches:
+                try:
+                    output_items = await self._run_downstream(execution_id, children, adjacency, batch)
+                except BatchNodeError as e:
+                    raise BatchNodeError(f"Batch {index + 1} failed: {str(e)}", e.node_id) from e
+                progress["batches"] += 1
+                progress["items"] += len(batch)
+                if index > progress["last_index"]:
+                    progress["last_index"] = index
+                    progress["last_items"] = output_items if output_items is not None else batch
+        
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            raise
+        return progress["last_items"], progress["batches"], progress["items"]
+    
+    async def _run_downstream(self, execution_id: str, roots: List[WorkflowNode],
+                              adjacency: Dict[str, List[WorkflowNode]],
+                              items: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Run the nodes reachable from ``roots`` on one batch; returns the last node's output"""
+        last_items = None
+        stack = [(root, items) for root in reversed(roots)]
+        while stack:
+            current, current_items = stack.pop()
+            if self._is_batch_node(current):
+                config = current.data.config
+                last_items, _, _ = await self._map_batches(
+                    execution_id, current, adjacency, current_items,
+                    max(1, int(config.get("batchSize", 100))), max(1, int(config.get("concurrency", 1)))
+                )
+                continue
+            try:
+                output_items, _ = await self._run_node_executor(execution_id, current, current_items, log_attempts=False)
+            except Exception as e:
+                raise BatchNodeError(f"node {current.data.label}: {str(e)}", current.id) from e
+            last_items = output_items
+            for connected_node in reversed(adjacency.get(current.id, [])):
+                stack.append((connected_node, output_items))
+        return last_items
+    
+    def _downstream_node_ids(self, node: WorkflowNode, adjacency: Dict[str, List[WorkflowNode]]) -> set:
+        """Ids of every node reachable from the node's outputs"""
+        seen = set()
+        stack = list(adjacency.get(node.id, []))
+        while stack:
+            current = stack.pop()
+            if current.id not in seen:
+                seen.add(current.id)
+                stack.extend(adjacency.get(current.id, []))
+        return seen
+    
+    async def _run_node_executor(self, execution_id: str, node: WorkflowNode,
+                                 items: List[Dict[str, Any]], log_attempts: bool = True):
+        """Produce a node's output items through the result cache or the executor.
+        
+        Returns the items and whether they came from the cache.
+        """
+        cache_key = node_cache_key(node, items) if self.cache.enabled and is_cacheable_node(node) else None
+        output_items = await self.cache.get(cache_key) if cache_key else None
+        if cache_key:
+            result = "miss" if output_items is None else "hit"
+            NODE_CACHE_REQUESTS.labels(result).inc()
+            stats = self.cache_stats.setdefault(execution_id, {"hit": 0, "miss": 0})
+            stats[result] += 1
+        if output_items is not None:
+            return output_items, True
+        
+        node_started = time.perf_counter()
+        try:
+            output_items = await self._invoke_with_retries(execution_id, node, items, log_attempts)
+        except Exception:
+            NODE_DURATION.labels(node.type, "error").observe(time.perf_counter() - node_started)
+            raise
+        NODE_DURATION.labels(node.type, "success").observe(time.perf_counter() - node_started)
+        if cache_key:
+            await self.cache.set(cache_key, output_items)
+        return output_items, False
+    
+    async def _invoke_with_retries(self, execution_id: str, node: WorkflowNode,
+                                   items: List[Dict[str, Any]], log_attempts: bool = True) -> List[Dict[str, Any]]:
+        """Run the node executor under the node's timeout, retry and hedging settings"""
+        config = node.data.config
+        # An explicit timeout of 0 disables the default limit
+        timeout = float(config["timeout"] if config.get("timeout") is not None else NODE_DEFAULT_TIMEOUT) or None
+        retries = max(0, int(config.get("retries", 0)))
+        hedge = bool(config.get("hedge"))
+        
+        if timeout is None and retries == 0 and not hedge:
+            return await self.node_executor(node, items)
+        
+        retry_delay = float(config.get("retryDelay", 1))
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(retries + 1),
+            wait=wait_exponential_jitter(
+                initial=retry_delay, max=float(config.get("retryMaxDelay", 30)), jitter=retry_delay
+            ),
+            reraise=True
+        )
+        async for attempt in retrying:
+            with attempt:
+                number = attempt.retry_state.attempt_number
+                started = time.perf_counter()
+                try:
+                    call = self._invoke_hedged(node, items) if hedge else self._invoke_once(node, items)
+                    output_items, hedged = await asyncio.wait_for(call, timeout)
+                except Exception as e:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    reason = f"timed out after {timeout:g}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+                    outcome = "retrying" if number <= retries else "giving up"
+                    if log_attempts:
+                        await self._add_execution_log(
+                            execution_id, "warning", node.data.label,
+                            f"Attempt {number} failed after {elapsed_ms:.0f} ms: {reason}; {outcome}"
+                        )
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise TimeoutError(f"Node {node.data.label} {reason}") from e
+                    raise
+                if log_attempts:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    answered_by = " (hedged request answered first)" if hedged else ""
+                    await self._add_execution_log(
+                        execution_id, "info", node.data.label,
+                        f"Attempt {number} succeeded in {elapsed_ms:.0f} ms{answered_by}"
+                    )
+        return output_items
+    
+    async def _invoke_once(self, node: WorkflowNode, items: List[Dict[str, Any]]):
+        started = time.perf_counter()
+        output_items = await self.node_executor(node, items)
+        self._record_latency(node, started)
+        return output_items, False
+    
+    async def _invoke_hedged(self, node: WorkflowNode, items: List[Dict[str, Any]]):
+        """Start a second request if the first is slower than the hedge delay; first success wins"""
+        delay = self._hedge_delay(node)
+        primary = asyncio.create_task(self._invoke_once(node, items))
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    tasks.add(asyncio.create_task(self._invoke_once(node, items)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        output_items, _ = task.result()
+                        return output_items, task is not primary
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _record_latency(self, node: WorkflowNode, started: float):
+        """Remember how long a successful call of the node took, for hedging"""
+        if node.data.config.get("hedge"):
+            samples = self.node_latencies.setdefault(node.id, collections.deque(maxlen=200))
+            samples.append(time.perf_counter() - started)
+    
+    def _hedge_delay(self, node: WorkflowNode) -> Optional[float]:
+        """Seconds to wait before hedging a call of the node, if known yet"""
+        config = node.data.config
+        if config.get("hedgeDelay") is not None:
+            return float(config["hedgeDelay"])
+        samples = self.node_latencies.get(node.id)
+        if not samples or len(samples) < NODE_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        percentile = float(config.get("hedgePercentile", 95)) / 100
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+    
+    async def _execute_node(self, execution_id: str, node: WorkflowNode, items: List[Dict[str, Any]],
+                            step: int = 0) -> List[Dict[str, Any]]:
+        """Execute a single node, checkpoint and return its output items"""
+        try:
+            # Update node status
+            await self._update_node_status(execution_id, node.id, "executing")
+            await self._add_execution_log(execution_id, "info", node.data.label, "Starting node execution")
             
-            # Simulate 95% success rate
-            if hash(node.id) % 20 == 0:  # 5% failure rate
-                raise Exception(f"Simulated execution failure in node {node.data.label}")
+            output_items, cached = await self._run_node_executor(execution_id, node, items)
+            message = "Node result served from cache" if cached else "Node executed successfully"
             
             # Mark node as success
-            await self._update_node_status(execution_id, node.id, "success")
-            await self._add_execution_log(execution_id, "success", node.data.label, "Node executed successfully")
+            await self._checkpoint_node(execution_id, step, node, output_items)
+            await self._add_execution_log(execution_id, "success", node.data.label, message)
             
-            # Find and execute connected nodes
-            connected_nodes = self._get_connected_nodes(node.id, workflow)
-            for connected_node in connected_nodes:
-                await self._execute_node_chain(execution_id, connected_node, workflow)
+            return output_items
                 
         except Exception as e:
+            self.failed_nodes[execution_id] = node.id
             await self._update_node_status(execution_id, node.id, "error")
             await self._add_execution_log(execution_id, "error", node.data.label, f"Node execution failed: {str(e)}")
             raise
     
+    def _is_batch_node(self, node: WorkflowNode) -> bool:
+        """Check if a node runs its downstream nodes once per batch of items"""
+        return node.type == "split-in-batches"
+    
     def _is_trigger_node(self, node: WorkflowNode) -> bool:
         """Check if a node is a trigger node"""
         trigger_types = ['manual-trigger', 'webhook', 'schedule', 'email-trigger']
         return node.type in trigger_types
     
-    def _get_connected_nodes(self, node_id: str, workflow: WorkflowResponse) -> List[WorkflowNode]:
-        """Get nodes connected to the output of the given node"""
-        connected_node_ids = [conn.target for conn in workflow.connections if conn.source == node_id]
-        return [node for node in workflow.nodes if node.id in connected_node_ids]
+    def _build_adjacency(self, workflow: WorkflowResponse) -> Dict[str, List[WorkflowNode]]:
+        """Map each node id to the nodes connected to its output, in workflow order"""
+        sources_by_target: Dict[str, set] = {}
+        for conn in workflow.connections:
+            sources_by_target.setdefault(conn.target, set()).add(conn.source)
+        
+        adjacency: Dict[str, List[WorkflowNode]] = {}
+        for node in workflow.nodes:
+            for source in sources_by_target.get(node.id, ()):
+                adjacency.setdefault(source, []).append(node)
+        return adjacency
     
-    async def _update_execution_status(self, execution_id: str, status: str, error_message: Optional[str] = None):
-        """Update execution status in database"""
+    async def wait_for_completion(self, execution_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for an execution to finish.
+        
+        Runs started by this process are awaited on their in-memory completion
+        future, so the caller wakes up as soon as the run ends. Runs owned by
+        another worker are followed through the execution store. Returns
+        ``None`` on timeout.
+        """
+        future = self.completion_futures.get(execution_id)
+        try:
+            if future is not None:
+                # Shield so a timed-out waiter does not cancel the shared future
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            if event_bus.shared:
+                return await asyncio.wait_for(self._wait_for_finished_event(execution_id), timeout)
+            return await asyncio.wait_for(self.store.wait_until_finished(execution_id), timeout)
+        except asyncio.TimeoutError:
+            return None
+    
+    async def _wait_for_finished_event(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Wait for the finish event another worker publishes for the execution.
+        
+        The event is also awaited for runs not in the store yet, such as
+        another worker's unsaved runs; those kept nowhere after they end are
+        answered from the event itself.
+        """
+        async with event_bus.subscribe(f"execution.{execution_id}.finished") as messages:
+            # Check after subscribing so a finish in between is not missed
+            execution = await self.store.get_execution(execution_id)
+            if execution is not None and execution["status"] in FINISHED_EXECUTION_STATUSES:
+                return execution
+            message = await messages.get()
+        return await self.store.get_execution(execution_id) or {"id": execution_id, "output_data": None, **message}
+    
+    async def _update_execution_status(self, execution_id: str, status: str, error_message: Optional[str] = None,
+                                       output_data: Optional[Dict[str, Any]] = None,
+                                       workflow: Optional[WorkflowResponse] = None):
+        """Update execution status in storage"""
         update_data = {"status": status, "updated_at": datetime.utcnow()}
-        if status in ["completed", "failed", "stopped"]:
+        if status in FINISHED_EXECUTION_STATUSES:
             update_data["finished_at"] = datetime.utcnow()
+            if workflow is not None:
+                update_data.update(execution_retention_fields(workflow, update_data["finished_at"]))
         if error_message:
             update_data["error_message"] = error_message
-            
-        await db.executions.update_one(
-            {"id": execution_id},
-            {"$set": update_data}
-        )
+        if output_data is not None:
+            update_data["output_data"] = output_data
+        
+        await self._store_for(execution_id).update_execution(execution_id, update_data)
     
     async def _update_node_status(self, execution_id: str, node_id: str, status: str):
         """Update node status in execution"""
-        await db.executions.update_one(
-            {"id": execution_id},
-            {"$set": {f"node_statuses.{node_id}": status}}
-        )
+        await self._store_for(execution_id).set_node_status(execution_id, node_id, status)
     
     async def _add_execution_log(self, execution_id: str, log_type: str, source: str, message: str):
         """Add log entry to execution"""
@@ -341,35 +1958,627 @@ class WorkflowExecutionEngine:
             "timestamp": datetime.utcnow()
         }
         
-        await db.executions.update_one(
-            {"id": execution_id},
-            {"$push": {"execution_logs": log_entry}}
-        )
+        await self._store_for(execution_id).append_log(execution_id, log_entry)
 
 # Initialize execution engine
-execution_engine = WorkflowExecutionEngine()
+execution_engine = WorkflowExecutionEngine(store=create_execution_store())
+
+# =============================================================================
+# EXECUTION RETENTION & ARCHIVAL
+# =============================================================================
+
+def execution_retention_fields(workflow: WorkflowResponse, finished_at: datetime) -> Dict[str, datetime]:
+    """Expiry fields to store on an execution when it finishes.
+    
+    Without an archive directory executions get ``expires_at`` and are removed
+    by the TTL index. With one they get ``archive_at`` instead, and the pruner
+    archives them before deleting.
+    """
+    days = workflow.retention_days if workflow.retention_days is not None else EXECUTION_RETENTION_DAYS
+    if not days:
+        return {}
+    field = "archive_at" if EXECUTION_ARCHIVE_DIR else "expires_at"
+    return {field: finished_at + timedelta(days=days)}
+
+def _archive_path(day: datetime) -> Path:
+    """Date-partitioned archive file for executions that finished on the given day"""
+    return Path(EXECUTION_ARCHIVE_DIR) / day.strftime("%Y/%m/%d") / "executions.jsonl.gz"
+
+def _write_execution_archive(executions: List[Dict[str, Any]]):
+    """Append executions to their daily archive files (blocking, run in a thread)"""
+    by_path: Dict[Path, List[str]] = {}
+    for execution in executions:
+        day = execution.get("finished_at") or execution["started_at"]
+        by_path.setdefault(_archive_path(day), []).append(json_util.dumps(execution))
+    
+    for path, lines in by_path.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Each append adds a gzip member; readers see one continuous stream
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            archive.write("\n".join(lines) + "\n")
+
+def _read_execution_archive(path: Path, workflow_id: str) -> List[Dict[str, Any]]:
+    """Load one workflow's executions from an archive file (blocking, run in a thread)"""
+    executions = []
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            if workflow_id in line:
+                execution = json_util.loads(line)
+                if execution.get("workflow_id") == workflow_id:
+                    executions.append(execution)
+    return executions
+
+async def prune_expired_executions() -> Dict[str, int]:
+    """Archive and delete executions past their retention, then drop expired blobs"""
+    now = datetime.utcnow()
+    archived = 0
+    
+    if EXECUTION_ARCHIVE_DIR:
+        while True:
+            cursor = db.executions.find({"archive_at": {"$lte": now}}, {"_id": 0})
+            batch = await cursor.sort("archive_at", 1).limit(EXECUTION_PRUNE_BATCH).to_list(EXECUTION_PRUNE_BATCH)
+            if not batch:
+                break
+            
+            execution_ids = [execution["id"] for execution in batch]
+            checkpoints: Dict[str, Dict[str, Any]] = {}
+            async for checkpoint in db.execution_checkpoints.find({"execution_id": {"$in": execution_ids}}, {"_id": 0}):
+                checkpoints.setdefault(checkpoint["execution_id"], {})[str(checkpoint["step"])] = {
+                    "node_id": checkpoint["node_id"], "items": await load_payload(checkpoint["items"])
+                }
+            
+            # Archives are self-contained: the blobs referenced by payloads are deleted below
+            for execution in batch:
+                execution["input_data"] = await load_payload(execution.get("input_data"))
+                execution["output_data"] = await load_payload(execution.get("output_data"))
+                if execution["id"] in checkpoints:
+                    execution["checkpoints"] = checkpoints[execution["id"]]
+            await asyncio.to_thread(_write_execution_archive, batch)
+            
+            await db.executions.delete_many({"id": {"$in": execution_ids}})
+            await db.execution_checkpoints.delete_many({"execution_id": {"$in": execution_ids}})
+            await blob_store.delete_where({"execution_id": {"$in": execution_ids}})
+            archived += len(batch)
+    
+    # Executions removed by the TTL index leave their blobs behind
+    blobs_deleted = await blob_store.delete_where({"expires_at": {"$lte": now}})
+    
+    return {"archived": archived, "blobs_deleted": blobs_deleted}
+
+async def restore_archived_executions(workflow_id: str, day: datetime) -> int:
+    """Restore one workflow's executions archived for the given day.
+    
+    Restored executions keep no expiry so they are not pruned again.
+    """
+    path = _archive_path(day)
+    if not EXECUTION_ARCHIVE_DIR or not path.exists():
+        return 0
+    
+    executions = await asyncio.to_thread(_read_execution_archive, path, workflow_id)
+    store = MongoExecutionStore(db)
+    for execution in executions:
+        execution.pop("archive_at", None)
+        checkpoints = execution.pop("checkpoints", None) or {}
+        for field in ("input_data", "output_data"):
+            execution[field] = await offload_payload(
+                execution.get(field),
+                {"kind": field, "execution_id": execution["id"], "workflow_id": workflow_id}
+            )
+        await db.executions.replace_one({"id": execution["id"]}, execution, upsert=True)
+        for step, checkpoint in checkpoints.items():
+            await store.save_checkpoint(execution["id"], int(step), checkpoint)
+    
+    return len(executions)
+
+async def run_execution_pruner():
+    """Background loop that applies execution retention"""
+    while True:
+        try:
+            result = await prune_expired_executions()
+            if any(result.values()):
+                logger.info(f"Execution pruning: {result}")
+        except Exception as e:
+            logger.error(f"Execution pruning failed: {str(e)}")
+        await asyncio.sleep(EXECUTION_PRUNE_INTERVAL)
+
+# =============================================================================
+# WORKFLOW REVISIONS
+# =============================================================================
+
+def diff_graph_items(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Structural delta turning one list of id'd items (nodes or connections) into another.
+    
+    Added items are stored whole, changed ones as their changed top-level
+    fields (and the names of dropped ones), removed ones by id; ``order`` is
+    only kept when applying the rest would not reproduce the new order.
+    Returns ``None`` when equal.
+    """
+    old_by_id = {item["id"]: item for item in old}
+    new_ids = {item["id"] for item in new}
+    delta: Dict[str, Any] = {}
+    
+    added = [item for item in new if item["id"] not in old_by_id]
+    patched = []
+    unset = []
+    for item in new:
+        previous = old_by_id.get(item["id"])
+        if previous is not None and previous != item:
+            changed = {key: value for key, value in item.items() if key not in previous or previous[key] != value}
+            if changed:
+                patched.append({"id": item["id"], **changed})
+            dropped = [key for key in previous if key not in item]
+            if dropped:
+                unset.append({"id": item["id"], "fields": dropped})
+    removed = [item["id"] for item in old if item["id"] not in new_ids]
+    
+    if added:
+        delta["add"] = added
+    if patched:
+        delta["patch"] = patched
+    if unset:
+        delta["unset"] = unset
+    if removed:
+        delta["remove"] = removed
+    if [item["id"] for item in apply_graph_delta(old, delta)] != [item["id"] for item in new]:
+        delta["order"] = [item["id"] for item in new]
+    return delta or None
+
+def apply_graph_delta(items: List[Dict[str, Any]], delta: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Apply a ``diff_graph_items`` delta to a list of items"""
+    if not delta:
+        return items
+    removed = set(delta.get("remove", ()))
+    patches = {patch["id"]: patch for patch in delta.get("patch", ())}
+    unset = {entry["id"]: set(entry["fields"]) for entry in delta.get("unset", ())}
+    result = []
+    for item in items:
+        if item["id"] in removed:
+            continue
+        if item["id"] in patches:
+            item = {**item, **patches[item["id"]]}
+        if item["id"] in unset:
+            item = {key: value for key, value in item.items() if key not in unset[item["id"]]}
+        result.append(item)
+    result.extend(delta.get("add", ()))
+    if "order" in delta:
+        by_id = {item["id"]: item for item in result}
+        result = [by_id[item_id] for item_id in delta["order"]]
+    return result
+
+def diff_workflow_graph(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Delta of a workflow's nodes and connections, or ``None`` if the graph is unchanged"""
+    delta = {}
+    for field in ("nodes", "connections"):
+        field_delta = diff_graph_items(old.get(field) or [], new.get(field) or [])
+        if field_delta:
+            delta[field] = field_delta
+    return delta or None
+
+def workflow_revision_document(workflow_id: str, revision: int, user_id: str,
+                               graph: Dict[str, Any], delta: Optional[Dict[str, Any]],
+                               created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """A revision: a full snapshot every WORKFLOW_SNAPSHOT_INTERVAL revisions or without a delta, else the delta"""
+    snapshot = delta is None or revision == 1 or (revision - 1) % WORKFLOW_SNAPSHOT_INTERVAL == 0
+    return {
+        "_id": ObjectId(),
+        "workflow_id": workflow_id,
+        "revision": revision,
+        "kind": "snapshot" if snapshot else "delta",
+        "data": {"nodes": graph.get("nodes") or [], "connections": graph.get("connections") or []} if snapshot else delta,
+        "created_at": created_at or datetime.utcnow(),
+        "created_by": user_id,
+    }
+
+async def store_workflow_revisions(documents: List[Dict[str, Any]]) -> List[bool]:
+    """Claim each document's revision number by storing it, before the workflow update that applies it.
+    
+    A number that is taken, still ahead of the workflow and older than
+    WORKFLOW_REVISION_CLAIM_SECONDS belongs to a save whose workflow update never
+    landed, and is taken over. Returns per document whether it was stored.
+    """
+    if not documents:
+        return []
+    taken = set()
+    try:
+        await db.workflow_revisions.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        taken = {error["index"] for error in e.details.get("writeErrors", []) if error.get("code") == 11000}
+        if len(taken) != len(e.details.get("writeErrors", [])):
+            raise
+    
+    stored = []
+    for index, document in enumerate(documents):
+        if index in taken:
+            workflow = await db.workflows.find_one({"id": document["workflow_id"]}, {"_id": 0, "revision": 1})
+            if workflow is not None and (workflow.get("revision") or 0) >= document["revision"]:
+                stored.append(False)
+                continue
+            stale = document["created_at"] - timedelta(seconds=WORKFLOW_REVISION_CLAIM_SECONDS)
+            replacement = {key: value for key, value in document.items() if key != "_id"}
+            replaced = await db.workflow_revisions.find_one_and_replace(
+                {"workflow_id": document["workflow_id"], "revision": document["revision"], "created_at": {"$lt": stale}},
+                replacement, projection={"_id": 1}
+            )
+            if replaced is not None:
+                document["_id"] = replaced["_id"]
+            stored.append(replaced is not None)
+        else:
+            stored.append(True)
+    return stored
+
+async def record_workflow_revision(workflow_id: str, revision: int, user_id: str,
+                                   graph: Dict[str, Any], delta: Optional[Dict[str, Any]],
+                                   created_at: Optional[datetime] = None) -> Optional[ObjectId]:
+    """Store one revision ahead of its workflow update; returns its ``_id``, or ``None`` if the number is taken"""
+    document = workflow_revision_document(workflow_id, revision, user_id, graph, delta, created_at)
+    stored, = await store_workflow_revisions([document])
+    return document["_id"] if stored else None
+
+async def load_workflow_revision(workflow_id: str, revision: int) -> Optional[Dict[str, Any]]:
+    """Rebuild a revision's nodes and connections from the nearest snapshot and the deltas after it"""
+    snapshot = await db.workflow_revisions.find_one(
+        {"workflow_id": workflow_id, "kind": "snapshot", "revision": {"$lte": revision}},
+        sort=[("revision", -1)]
+    )
+    if snapshot is None:
+        return None
+    
+    graph = dict(snapshot["data"])
+    current = snapshot["revision"]
+    async for entry in db.workflow_revisions.find(
+        {"workflow_id": workflow_id, "revision": {"$gt": current, "$lte": revision}},
+        {"_id": 0, "revision": 1, "kind": 1, "data": 1}
+    ).sort("revision", 1):
+        if entry["kind"] == "snapshot":
+            graph = dict(entry["data"])
+        else:
+            for field, field_delta in entry["data"].items():
+                graph[field] = apply_graph_delta(graph.get(field) or [], field_delta)
+        current = entry["revision"]
+    
+    if current != revision:
+        # The requested revision was compacted away
+        return None
+    return {"revision": revision, **graph}
+
+async def compact_workflow_revisions(workflow_id: str, cutoff: datetime) -> int:
+    """Thin a workflow's revisions older than ``cutoff`` to the last one of each day.
+    
+    Kept deltas are rewritten against the previous kept revision, so any
+    remaining revision can still be rebuilt. Only revisions from the workflow's
+    compaction watermark (the last revision an earlier pass kept) on are read.
+    Returns how many were removed.
+    """
+    watermark = await db.workflow_revision_compactions.find_one({"_id": workflow_id})
+    since = watermark["revision"] if watermark else 0
+    entries = await db.workflow_revisions.find(
+        {"workflow_id": workflow_id, "revision": {"$gte": since}, "created_at": {"$lt": cutoff}}
+    ).sort("revision", 1).to_list(length=None)
+    if not entries:
+        return 0
+    newer = await db.workflow_revisions.find_one(
+        {"workflow_id": workflow_id, "created_at": {"$gte": cutoff}}, sort=[("revision", 1)]
+    )
+    
+    # The last old revision of each day, the watermark and the one the first newer revision builds on, stay
+    keep = {since}
+    for index, entry in enumerate(entries):
+        following = entries[index + 1] if index + 1 < len(entries) else None
+        if entry["kind"] == "snapshot" or following is None or following["created_at"].date() != entry["created_at"].date():
+            keep.add(entry["revision"])
+    if newer is not None and newer["kind"] == "delta":
+        keep.add(entries[-1]["revision"])
+    
+    graph: Dict[str, Any] = {}
+    kept_graph: Dict[str, Any] = {}
+    removed = []
+    rewrites = []
+    skipped = False
+    for entry in entries:
+        if entry["revision"] == since and entry["kind"] == "delta":
+            anchor = await load_workflow_revision(workflow_id, since)
+            graph = {"nodes": anchor["nodes"], "connections": anchor["connections"]}
+        elif entry["kind"] == "snapshot":
+            graph = dict(entry["data"])
+        else:
+            for field, field_delta in entry["data"].items():
+                graph[field] = apply_graph_delta(graph.get(field) or [], field_delta)
+        
+        if entry["revision"] not in keep:
+            removed.append(entry["_id"])
+            skipped = True
+            continue
+        if entry["kind"] == "delta" and skipped:
+            rewrites.append(UpdateOne(
+                {"_id": entry["_id"]}, {"$set": {"data": diff_workflow_graph(kept_graph, graph) or {}}}
+            ))
+        kept_graph = dict(graph)
+        skipped = False
+    
+    if rewrites:
+        await db.workflow_revisions.bulk_write(rewrites, ordered=False)
+    if removed:
+        await db.workflow_revisions.delete_many({"_id": {"$in": removed}})
+    await db.workflow_revision_compactions.update_one(
+        {"_id": workflow_id},
+        {"$set": {"revision": entries[-1]["revision"], "cutoff": cutoff}},
+        upsert=True
+    )
+    return len(removed)
+
+# Cutoff of the last completed compaction pass; deltas before it were already seen
+_compacted_until: Optional[datetime] = None
+
+async def compact_revisions() -> int:
+    """Compact the revision history of every workflow with new revisions past the keep window"""
+    global _compacted_until
+    cutoff = datetime.utcnow() - timedelta(days=WORKFLOW_REVISION_KEEP_DAYS)
+    window = {"$lt": cutoff} if _compacted_until is None else {"$gte": _compacted_until, "$lt": cutoff}
+    workflow_ids = await db.workflow_revisions.distinct("workflow_id", {"created_at": window, "kind": "delta"})
+    removed = 0
+    for workflow_id in workflow_ids:
+        removed += await compact_workflow_revisions(workflow_id, cutoff)
+    _compacted_until = cutoff
+    return removed
+
+async def run_revision_compactor():
+    """Background loop that compacts old workflow revisions"""
+    while True:
+        try:
+            removed = await compact_revisions()
+            if removed:
+                logger.info(f"Revision compaction removed {removed} revisions")
+        except Exception as e:
+            logger.error(f"Revision compaction failed: {str(e)}")
+        await asyncio.sleep(WORKFLOW_REVISION_COMPACT_INTERVAL)
+
+# =============================================================================
+# WORKFLOW DELETION
+# =============================================================================
+
+async def _purge_chunks(deletion_id: str, workflow_id: str, collection_name: str, counter: str,
+                        with_blobs: bool = False) -> int:
+    """Delete a workflow's documents from a collection one chunk at a time, counting progress.
+    
+    With ``with_blobs`` the chunk is executions whose checkpoints and offloaded payloads
+    go first, so an interrupted purge never leaves them without an execution.
+    """
+    collection = db[collection_name]
+    deleted = 0
+    while True:
+        chunk = await collection.find(
+            {"workflow_id": workflow_id}, {"_id": 1, "id": 1}
+        ).limit(WORKFLOW_PURGE_BATCH).to_list(WORKFLOW_PURGE_BATCH)
+        if not chunk:
+            return deleted
+        
+        progress = {}
+        if with_blobs:
+            execution_ids = [document["id"] for document in chunk]
+            await db.execution_checkpoints.delete_many({"execution_id": {"$in": execution_ids}})
+            progress["deleted.blobs"] = await blob_store.delete_where({"execution_id": {"$in": execution_ids}})
+        result = await collection.delete_many({"_id": {"$in": [document["_id"] for document in chunk]}})
+        progress[f"deleted.{counter}"] = result.deleted_count
+        deleted += result.deleted_count
+        await db.workflow_deletions.update_one(
+            {"id": deletion_id},
+            {"$inc": progress, "$set": {"updated_at": datetime.utcnow()}}
+        )
+        await asyncio.sleep(WORKFLOW_PURGE_PAUSE)
+
+async def purge_deleted_workflow(deletion: Dict[str, Any]):
+    """Remove everything a deleted workflow left behind; safe to rerun after an interruption"""
+    deletion_id, workflow_id = deletion["id"], deletion["workflow_id"]
+    await db.workflow_deletions.update_one(
+        {"id": deletion_id},
+        {"$set": {"status": "running", "updated_at": datetime.utcnow()}}
+    )
+    # The request marks the deletion before removing the workflow; finish that if it was cut
+    # short, but leave a workflow re-created under the same id since
+    await db.workflows.delete_one({"id": workflow_id, "updated_at": {"$lte": deletion["requested_at"]}})
+    
+    await _purge_chunks(deletion_id, workflow_id, "executions", "executions", with_blobs=True)
+    await _purge_chunks(deletion_id, workflow_id, "workflow_revisions", "revisions")
+    await db.workflow_revision_compactions.delete_one({"_id": workflow_id})
+    await _purge_chunks(deletion_id, workflow_id, "execution_stats", "stats")
+    blobs = await blob_store.delete_where({"workflow_id": workflow_id})
+    
+    # A run that finished meanwhile sets the job back to pending, so the next pass purges it too
+    now = datetime.utcnow()
+    await db.workflow_deletions.update_one(
+        {"id": deletion_id, "status": "running"},
+        {"$inc": {"deleted.blobs": blobs}, "$set": {"status": "completed", "updated_at": now, "finished_at": now}}
+    )
+
+async def requeue_workflow_purge(workflow_id: str, since: datetime):
+    """Purge again after a run queued at ``since`` wrote its execution and statistics.
+    
+    Only deletions requested while the run was going can have missed its data.
+    """
+    deletion = await db.workflow_deletions.find_one(
+        {"workflow_id": workflow_id, "requested_at": {"$gte": since}}, {"_id": 0, "id": 1},
+        sort=[("requested_at", -1)]
+    )
+    if deletion is None or await db.workflows.find_one({"id": workflow_id}, {"_id": 1}):
+        return
+    await db.workflow_deletions.update_one(
+        {"id": deletion["id"]},
+        {"$set": {"status": "pending", "updated_at": datetime.utcnow()}, "$unset": {"finished_at": ""}}
+    )
+
+async def run_workflow_purger():
+    """Background loop that purges the data of deleted workflows, oldest request first"""
+    while True:
+        try:
+            pending = db.workflow_deletions.find(
+                {"status": {"$ne": "completed"}}, {"_id": 0, "id": 1, "workflow_id": 1, "requested_at": 1}
+            ).sort("requested_at", 1)
+            async for deletion in pending:
+                await purge_deleted_workflow(deletion)
+                logger.info(f"Purged data of deleted workflow {deletion['workflow_id']}")
+        except Exception as e:
+            logger.error(f"Workflow purge failed: {str(e)}")
+        await asyncio.sleep(WORKFLOW_PURGE_INTERVAL)
 
 # =============================================================================
 # STARTUP/SHUTDOWN HANDLERS
 # =============================================================================
 
+# Indexes every deployment needs, by collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("id", unique=True),
+    ],
+    "workflows": [
+        IndexModel("id", unique=True),
+        IndexModel("nodes.id"),
+        # Search: full text scoped to the owner, tag filters and keyset-paginated sorts
+        IndexModel(
+            [("created_by", 1), ("name", "text"), ("description", "text"), ("tags", "text")],
+            name="workflow_search", weights={"name": 10, "tags": 5, "description": 1}
+        ),
+        IndexModel([("created_by", 1), ("tags", 1), ("updated_at", -1), ("id", -1)]),
+        IndexModel([("created_by", 1), ("updated_at", -1), ("id", -1)]),
+        IndexModel([("created_by", 1), ("last_run", -1), ("id", -1)]),
+    ],
+    "executions": [
+        IndexModel("id", unique=True),
+        IndexModel([("workflow_id", 1), ("queued_at", -1)]),
+        IndexModel("expires_at", expireAfterSeconds=0),
+        IndexModel("archive_at", sparse=True),
+    ],
+    "execution_checkpoints": [
+        IndexModel([("execution_id", 1), ("step", 1)], unique=True),
+        IndexModel("expires_at", expireAfterSeconds=0),
+    ],
+    "blobs.files": [
+        IndexModel("metadata.workflow_id"),
+        IndexModel("metadata.execution_id"),
+        IndexModel("metadata.expires_at", sparse=True),
+    ],
+    "workflow_revisions": [
+        IndexModel([("workflow_id", 1), ("revision", 1)], unique=True),
+        IndexModel([("workflow_id", 1), ("kind", 1), ("revision", -1)]),
+        IndexModel([("created_at", 1), ("kind", 1)]),
+    ],
+    "execution_stats": [
+        IndexModel([("workflow_id", 1), ("day", 1)]),
+    ],
+    "workflow_deletions": [
+        IndexModel("id", unique=True),
+        IndexModel([("workflow_id", 1), ("requested_at", -1)]),
+        IndexModel([("status", 1), ("requested_at", 1)]),
+    ],
+    # Keys are unique through their _id
+    "idempotency_keys": [
+        IndexModel("expires_at", expireAfterSeconds=0),
+    ],
+}
+
+async def ensure_collection_indexes(collection_name: str, indexes: List[IndexModel]) -> List[str]:
+    """Create the collection's missing indexes in one command; returns their names"""
+    collection = db[collection_name]
+    existing = await collection.index_information()
+    missing = [index for index in indexes if index.document["name"] not in existing]
+    if not missing:
+        return []
+    names = await collection.create_indexes(missing)
+    return [f"{collection_name}.{name}" for name in names]
+
+async def ensure_indexes():
+    """Create any missing indexes from INDEXES, all collections concurrently"""
+    created = await asyncio.gather(*(
+        ensure_collection_indexes(collection_name, indexes)
+        for collection_name, indexes in INDEXES.items()
+    ))
+    created = [name for names in created for name in names]
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+
+# Cluster-wide background loops, run only by the leader worker
+LEADER_TASKS = [run_execution_pruner, run_revision_compactor, run_workflow_purger]
+
+async def run_leader_duties(lease: LeaderLease, is_leader: bool):
+    """Keep the leader lease and run cluster-wide background work while holding it.
+    
+    Every worker competes for the lease; the holder renews it and runs the
+    LEADER_TASKS loops, and another worker takes over once it expires.
+    """
+    tasks: List[asyncio.Task] = []
+    try:
+        while True:
+            if is_leader and not tasks:
+                logger.info(f"Worker {WORKER_ID} is the leader")
+                tasks = [asyncio.create_task(loop()) for loop in LEADER_TASKS]
+            elif not is_leader and tasks:
+                logger.info(f"Worker {WORKER_ID} lost leadership")
+                for task in tasks:
+                    task.cancel()
+                tasks = []
+            
+            await asyncio.sleep(lease.ttl / 3)
+            try:
+                is_leader = await lease.acquire()
+            except Exception as e:
+                logger.error(f"Leader lease renewal failed: {str(e)}")
+                is_leader = False
+    finally:
+        for task in tasks:
+            task.cancel()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    logger.info("Starting Quantamworkforce Backend API")
+    logger.info(f"Starting Quantamworkforce Backend API (worker {WORKER_ID})")
+    
+    # Unsaved runs and completion waiters live in one process, so several workers only
+    # agree on them through a shared event bus; the memory and file stores never do
+    if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+        if not event_bus.shared:
+            raise RuntimeError("WEB_CONCURRENCY > 1 requires REDIS_URL for a shared event bus")
+        if EXECUTION_STORE != "mongo":
+            raise RuntimeError(f"WEB_CONCURRENCY > 1 requires EXECUTION_STORE=mongo, not {EXECUTION_STORE}")
+    
+    lifespan_began = time.perf_counter()
+    STARTUP_DURATION.labels("module").set(lifespan_began - STARTUP_BEGAN)
+    
+    # Every worker checks the indexes: creating only the missing ones is cheap, and a
+    # worker of a new release may not win the lease while an old leader's is still live
+    indexes_began = time.perf_counter()
+    await ensure_indexes()
+    STARTUP_DURATION.labels("indexes").set(time.perf_counter() - indexes_began)
     
-    # Create indexes
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("id", unique=True)
-    await db.workflows.create_index("id", unique=True)
-    await db.workflows.create_index("created_by")
-    await db.executions.create_index("id", unique=True)
-    await db.executions.create_index("workflow_id")
+    lease = LeaderLease(db, "leader")
+    is_leader = await lease.acquire()
+    
+    await event_bus.start()
+    background_tasks = [
+        asyncio.create_task(run_leader_duties(lease, is_leader)),
+        asyncio.create_task(run_cache_invalidation_listener()),
+    ]
+    
+    ready = time.perf_counter()
+    STARTUP_DURATION.labels("lifespan").set(ready - lifespan_began)
+    STARTUP_DURATION.labels("total").set(ready - STARTUP_BEGAN)
+    logger.info(
+        f"Startup completed in {(ready - STARTUP_BEGAN) * 1000:.0f} ms "
+        f"(module {(lifespan_began - STARTUP_BEGAN) * 1000:.0f} ms, "
+        f"lifespan {(ready - lifespan_began) * 1000:.0f} ms)"
+    )
     
     yield
     
     # Shutdown
     logger.info("Shutting down Quantamworkforce Backend API")
+    for task in background_tasks:
+        task.cancel()
+    await lease.release()
+    await event_bus.close()
+    if isinstance(execution_engine.store, FileExecutionStore):
+        await execution_engine.store.flush()
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
     client.close()
 
 # Create FastAPI app
@@ -377,11 +2586,12 @@ app = FastAPI(
     title="Quantamworkforce API",
     description="Production-grade N8N clone - Workflow automation platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Create API router
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=TracedRoute if TRACING_ENABLED else APIRoute)
 
 # CORS middleware
 app.add_middleware(
@@ -390,8 +2600,46 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Observe request latency labelled by route template"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(
+        request.method, route.path if route else "unmatched", str(response.status_code)
+    ).observe(time.perf_counter() - started)
+    return response
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Record request traces and keep the slow ones for /api/debug/traces"""
+    if not TRACING_ENABLED:
+        return await call_next(request)
+    
+    trace = RequestTrace(request.method, request.url.path)
+    token = current_trace.set(trace)
+    try:
+        return await call_next(request)
+    finally:
+        current_trace.reset(token)
+        trace.duration = time.perf_counter() - trace.started
+        if trace.duration * 1000 >= TRACE_SLOW_MS:
+            slow_traces.append(trace)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics, aggregated across workers in multiprocess mode"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
 # =============================================================================
 # API ROUTES - HEALTH & STATUS
 # =============================================================================
@@ -514,6 +2762,7 @@ async def update_current_user(
         {"id": current_user.id},
         {"$set": update_data}
     )
+    await invalidate_cache("users", current_user.id)
     
     # Get updated user
     updated_user = await db.users.find_one({"id": current_user.id})
@@ -541,6 +2790,8 @@ async def create_workflow(
         "is_active": False,
         "last_run": None,
         "executions": 0,
+        "retention_days": workflow.retention_days,
+        "save_policy": workflow.save_policy,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
         "created_by": current_user.id
@@ -549,33 +2800,326 @@ async def create_workflow(
     await db.workflows.insert_one(workflow_data)
     return WorkflowResponse(**workflow_data)
 
+def _encode_page_cursor(value: Any, workflow_id: str) -> str:
+    """Opaque keyset cursor for the position after a workflow"""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value, workflow_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def _decode_page_cursor(cursor: str):
+    try:
+        value, workflow_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif value is not None and not isinstance(value, (int, float)):
+            raise TypeError(value)
+        return value, str(workflow_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after_page_cursor(sort: str, value: Optional[datetime], workflow_id: str) -> Dict[str, Any]:
+    """Filter for the workflows after a cursor in (sort desc, id desc) order; nulls sort last"""
+    if value is None:
+        return {sort: None, "id": {"$lt": workflow_id}}
+    return {"$or": [
+        {sort: {"$lt": value}},
+        {sort: value, "id": {"$lt": workflow_id}},
+        {sort: None},
+    ]}
+
+async def _search_workflows(query: Dict[str, Any], limit: int, cursor: Optional[str]) -> ORJSONResponse:
+    """Text search results, best match first, keyset-paginated on (score, id).
+    
+    A ``$text`` query runs on the text index, which cannot also serve a field
+    sort; ranking by score lets MongoDB keep only the top ``limit`` matches.
+    """
+    pipeline: List[Dict[str, Any]] = [{"$match": query}, {"$addFields": {"score": {"$meta": "textScore"}}}]
+    if cursor:
+        score, workflow_id = _decode_page_cursor(cursor)
+        if not isinstance(score, (int, float)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "id": {"$lt": workflow_id}},
+        ]}})
+    # One extra row tells whether another page follows
+    pipeline += [
+        {"$sort": {"score": -1, "id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {**WORKFLOW_RESPONSE_PROJECTION, "score": 1}},
+    ]
+    workflows = await db.workflows.aggregate(pipeline).to_list(length=limit + 1)
+    
+    headers = {}
+    if len(workflows) > limit:
+        workflows = workflows[:limit]
+        headers["X-Next-Cursor"] = _encode_page_cursor(workflows[-1]["score"], workflows[-1]["id"])
+    for workflow in workflows:
+        del workflow["score"]
+    return ORJSONResponse([workflow_response_document(workflow) for workflow in workflows], headers=headers)
+
 @api_router.get("/workflows", response_model=List[WorkflowResponse])
 async def get_workflows(
     skip: int = 0,
     limit: int = 100,
+    q: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    sort: Optional[Literal["updated_at", "last_run"]] = None,
+    cursor: Optional[str] = None,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Get user's workflows.
+    
+    ``q`` searches name, description and tags through the text index, best
+    match first; each ``tags`` value must be present. Searches, ``sort`` and
+    ``cursor`` switch to keyset pagination, listings newest first by ``sort``
+    (default ``updated_at``); the ``X-Next-Cursor`` response header holds the
+    cursor of the next page.
+    """
+    limit = max(1, min(limit, 1000))
+    query: Dict[str, Any] = {"created_by": current_user.id}
+    if q:
+        query["$text"] = {"$search": q}
+    if tags:
+        query["tags"] = {"$all": tags}
+    
+    if q:
+        if sort:
+            raise HTTPException(status_code=400, detail="Search results are ordered by relevance and cannot be sorted")
+        return await _search_workflows(query, limit, cursor)
+    
+    if not (tags or sort or cursor):
+        workflows = await db.workflows.find(query, WORKFLOW_RESPONSE_PROJECTION).skip(skip).limit(limit).to_list(length=limit)
+        return ORJSONResponse([workflow_response_document(workflow) for workflow in workflows])
+    
+    sort = sort or "updated_at"
+    if cursor:
+        value, workflow_id = _decode_page_cursor(cursor)
+        if value is not None and not isinstance(value, datetime):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = {"$and": [query, _after_page_cursor(sort, value, workflow_id)]}
+    
+    # One extra row tells whether another page follows
+    workflows = await db.workflows.find(query, WORKFLOW_RESPONSE_PROJECTION).sort(
+        [(sort, -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    
+    headers = {}
+    if len(workflows) > limit:
+        workflows = workflows[:limit]
+        headers["X-Next-Cursor"] = _encode_page_cursor(workflows[-1].get(sort), workflows[-1]["id"])
+    return ORJSONResponse([workflow_response_document(workflow) for workflow in workflows], headers=headers)
+
+def _ndjson_default(value: Any) -> Any:
+    """JSON encoder fallback for NDJSON export"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+@api_router.get("/workflows/export")
+async def export_workflows(current_user: UserResponse = Depends(get_current_user)):
+    """Stream all of the user's workflows as NDJSON"""
+    async def generate():
+        cursor = db.workflows.find({"created_by": current_user.id}, {"_id": 0}).batch_size(200)
+        lines = []
+        async for workflow in cursor:
+            lines.append(json.dumps(workflow, default=_ndjson_default))
+            if len(lines) >= 100:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="workflows.ndjson"'}
+    )
+
+async def _import_workflow_batch(batch: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+    """Upsert a batch of parsed import lines with one bulk write, each as a snapshot revision"""
+    results = [item["result"] for item in batch]
+    operations = []
+    positions = []
+    operation_ids = []
+    revision_ids = []
+    now = datetime.utcnow()
+    
+    items = [(position, item) for position, item in enumerate(batch) if item.get("workflow") is not None]
+    if not items:
+        return results
+    existing = {
+        workflow["id"]: workflow
+        async for workflow in db.workflows.find(
+            {"id": {"$in": [item["result"]["id"] for _, item in items]}},
+            {"_id": 0, "id": 1, "created_by": 1, "revision": 1}
+        )
+    }
+    # Ids whose deleted data is still being purged cannot be reused yet
+    deleting = set(await db.workflow_deletions.distinct(
+        "workflow_id",
+        {"workflow_id": {"$in": [item["result"]["id"] for _, item in items]}, "status": {"$ne": "completed"}}
+    ))
+    
+    pending = []
+    for position, item in items:
+        workflow_id = item["result"]["id"]
+        current = existing.get(workflow_id)
+        if current is not None and current["created_by"] != user_id:
+            results[position].update({"status": "error", "error": "Workflow id already exists"})
+            continue
+        if workflow_id in deleting:
+            results[position].update({"status": "error", "error": "Workflow is being deleted, please retry later"})
+            continue
+        workflow = item["workflow"]
+        fields = workflow.dict(exclude={"id"})
+        fields["nodes"] = [node.dict() for node in workflow.nodes]
+        fields["connections"] = [conn.dict() for conn in workflow.connections]
+        fields["updated_at"] = now
+        revision = (current or {}).get("revision")
+        document = workflow_revision_document(workflow_id, (revision or 0) + 1, user_id, fields, None, now)
+        pending.append((position, workflow_id, fields, revision, document))
+    
+    # Like a save, each imported graph claims its revision before the workflow is written
+    stored = await store_workflow_revisions([document for *_, document in pending])
+    for (position, workflow_id, fields, revision, document), claimed in zip(pending, stored):
+        if not claimed:
+            results[position].update({"status": "error", "error": "Workflow was modified concurrently, please retry"})
+            continue
+        operations.append(UpdateOne(
+            {"id": workflow_id, "created_by": user_id, "revision": revision},
+            {
+                "$set": {**fields, "revision": document["revision"]},
+                "$setOnInsert": {"executions": 0, "last_run": None, "created_at": now}
+            },
+            upsert=True
+        ))
+        positions.append(position)
+        operation_ids.append(workflow_id)
+        revision_ids.append(document["_id"])
+    
+    if not operations:
+        return results
+    
+    failed = {}
+    try:
+        result = await db.workflows.bulk_write(operations, ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        upserted = {entry["index"]: entry["_id"] for entry in e.details.get("upserted", [])}
+        # A duplicate id here means the workflow changed since it was read, or was just
+        # created by another user
+        failed = {
+            error["index"]: error.get("errmsg") if error.get("code") != 11000
+            else "Workflow was modified concurrently, please retry" if operation_ids[error["index"]] in existing
+            else "Workflow id already exists"
+            for error in e.details.get("writeErrors", [])
+        }
+    
+    if failed:
+        await db.workflow_revisions.delete_many({"_id": {"$in": [revision_ids[index] for index in failed]}})
+    for index, position in enumerate(positions):
+        if index in failed:
+            results[position].update({"status": "error", "error": failed[index]})
+        else:
+            results[position]["status"] = "created" if index in upserted else "updated"
+    
+    return results
+
+@api_router.post("/workflows/import")
+async def import_workflows(
+    request: Request,
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get user's workflows"""
-    cursor = db.workflows.find({"created_by": current_user.id}).skip(skip).limit(limit)
-    workflows = await cursor.to_list(length=limit)
+    """Import workflows from an NDJSON request body.
     
-    return [WorkflowResponse(**workflow) for workflow in workflows]
+    Lines carrying the id of one of the user's workflows update it; other
+    lines create a workflow. The body is parsed as it streams in and written
+    in batches of ``WORKFLOW_IMPORT_BATCH``.
+    """
+    results = []
+    batch = []
+    line_number = 0
+    buffer = b""
+    
+    def parse_line(raw: bytes):
+        nonlocal line_number
+        line_number += 1
+        if not raw.strip():
+            return
+        result = {"line": line_number, "id": None, "status": "error"}
+        try:
+            workflow = WorkflowImport(**json.loads(raw))
+            result["id"] = workflow.id or str(uuid.uuid4())
+            batch.append({"result": result, "workflow": workflow})
+        except (ValueError, TypeError) as e:
+            result["error"] = str(e)
+            batch.append({"result": result})
+    
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            parse_line(raw)
+        if len(batch) >= WORKFLOW_IMPORT_BATCH:
+            results.extend(await _import_workflow_batch(batch, current_user.id))
+            batch = []
+    
+    parse_line(buffer)
+    if batch:
+        results.extend(await _import_workflow_batch(batch, current_user.id))
+    
+    summary = {state: sum(1 for result in results if result["status"] == state)
+               for state in ("created", "updated", "error")}
+    return {"summary": summary, "results": results}
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the values that determine a representation"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:24]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match accepts the given ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+# Fields that change whenever a workflow's representation does
+WORKFLOW_ETAG_PROJECTION = {"_id": 0, "id": 1, "updated_at": 1, "revision": 1, "executions": 1, "last_run": 1}
+
+def workflow_etag(workflow: Dict[str, Any]) -> str:
+    return make_etag(
+        "workflow", workflow["id"], workflow.get("revision", 0), workflow.get("updated_at"),
+        workflow.get("executions", 0), workflow.get("last_run")
+    )
 
 @api_router.get("/workflows/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(
     workflow_id: str,
+    request: Request,
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get a specific workflow"""
-    workflow = await db.workflows.find_one({
-        "id": workflow_id,
-        "created_by": current_user.id
-    })
+    """Get a specific workflow; answers If-None-Match with 304 from a projection-only read"""
+    query = {"id": workflow_id, "created_by": current_user.id}
+    headers = {"Cache-Control": "private, no-cache"}
+    
+    if request.headers.get("if-none-match"):
+        version = await db.workflows.find_one(query, WORKFLOW_ETAG_PROJECTION)
+        if not version:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+        etag = workflow_etag(version)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+    
+    workflow = await db.workflows.find_one(query, WORKFLOW_RESPONSE_PROJECTION)
     
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    return WorkflowResponse(**workflow)
+    return ORJSONResponse(
+        workflow_response_document(workflow), headers={**headers, "ETag": workflow_etag(workflow)}
+    )
 
 @api_router.put("/workflows/{workflow_id}", response_model=WorkflowResponse)
 async def update_workflow(
@@ -604,50 +3148,213 @@ async def update_workflow(
         update_data["tags"] = workflow_update.tags
     if workflow_update.is_active is not None:
         update_data["is_active"] = workflow_update.is_active
+    if workflow_update.retention_days is not None:
+        # Applies to executions that finish from now on
+        update_data["retention_days"] = workflow_update.retention_days
+    if workflow_update.save_policy is not None:
+        update_data["save_policy"] = workflow_update.save_policy
     if workflow_update.nodes is not None:
         update_data["nodes"] = [node.dict() for node in workflow_update.nodes]
     if workflow_update.connections is not None:
         update_data["connections"] = [conn.dict() for conn in workflow_update.connections]
     
-    await db.workflows.update_one(
-        {"id": workflow_id},
-        {"$set": update_data}
-    )
+    # Graph changes become a new revision. The revision is stored first, then the
+    # update applies only on top of the revision it was diffed against; a concurrent
+    # save that got there first means re-reading and diffing again
+    for _ in range(3):
+        delta = diff_workflow_graph(existing_workflow, {**existing_workflow, **update_data})
+        if delta is None:
+            await db.workflows.update_one({"id": workflow_id}, {"$set": update_data})
+            break
+        
+        current = existing_workflow.get("revision")
+        revision = (current or 0) + 1
+        revision_id = await record_workflow_revision(
+            workflow_id, revision, current_user.id,
+            {**existing_workflow, **update_data}, delta, update_data["updated_at"]
+        )
+        if revision_id is not None:
+            result = await db.workflows.update_one(
+                {"id": workflow_id, "revision": current},
+                {"$set": {**update_data, "revision": revision}}
+            )
+            if result.modified_count:
+                break
+            await db.workflow_revisions.delete_one({"_id": revision_id})
+        existing_workflow = await db.workflows.find_one({"id": workflow_id})
+        if not existing_workflow:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+    else:
+        raise HTTPException(status_code=409, detail="Workflow was modified concurrently, please retry")
     
     # Get updated workflow
     updated_workflow = await db.workflows.find_one({"id": workflow_id})
     return WorkflowResponse(**updated_workflow)
 
+@api_router.get("/workflows/{workflow_id}/revisions", response_model=List[WorkflowRevisionResponse])
+async def get_workflow_revisions(
+    workflow_id: str,
+    before: Optional[int] = None,
+    limit: int = 50,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """List a workflow's revisions, newest first"""
+    workflow = await db.workflows.find_one({
+        "id": workflow_id,
+        "created_by": current_user.id
+    }, {"_id": 1, "revision": 1})
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    # Revisions past the workflow's are saves still being applied, or that failed to
+    query: Dict[str, Any] = {"workflow_id": workflow_id, "revision": {"$lte": workflow.get("revision") or 0}}
+    if before is not None:
+        query["revision"]["$lt"] = before
+    limit = max(1, min(limit, 500))
+    revisions = await db.workflow_revisions.find(query, {"_id": 0, "data": 0}).sort("revision", -1).limit(limit).to_list(length=limit)
+    return [WorkflowRevisionResponse(**revision) for revision in revisions]
+
+@api_router.get("/workflows/{workflow_id}/revisions/{revision}")
+async def get_workflow_revision(
+    workflow_id: str,
+    revision: int,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Nodes and connections of a workflow as of a past revision"""
+    workflow = await db.workflows.find_one({
+        "id": workflow_id,
+        "created_by": current_user.id
+    }, {"_id": 1, "revision": 1})
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    graph = await load_workflow_revision(workflow_id, revision) if revision <= (workflow.get("revision") or 0) else None
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return {"workflow_id": workflow_id, **graph}
+
 @api_router.delete("/workflows/{workflow_id}")
 async def delete_workflow(
     workflow_id: str,
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Delete a workflow"""
-    result = await db.workflows.delete_one({
+    """Delete a workflow; its executions, revisions and blobs are purged in the background"""
+    workflow = await db.workflows.find_one({
         "id": workflow_id,
         "created_by": current_user.id
-    })
+    }, {"_id": 0, "name": 1})
     
-    if result.deleted_count == 0:
+    if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    # Also delete associated executions
-    await db.executions.delete_many({"workflow_id": workflow_id})
+    # Record the deletion first so the purger finishes it even if this request dies
+    await db.workflow_deletions.insert_one({
+        "id": str(uuid.uuid4()),
+        "workflow_id": workflow_id,
+        "name": workflow.get("name", ""),
+        "created_by": current_user.id,
+        "status": "pending",
+        "deleted": {"executions": 0, "revisions": 0, "stats": 0, "blobs": 0},
+        "requested_at": datetime.utcnow(),
+    })
+    await db.workflows.delete_one({"id": workflow_id})
     
     return {"message": "Workflow deleted successfully"}
 
+@api_router.get("/workflows/{workflow_id}/deletion", response_model=WorkflowDeletionResponse)
+async def get_workflow_deletion(
+    workflow_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Progress of purging a deleted workflow's data, for its latest deletion"""
+    deletion = await db.workflow_deletions.find_one({
+        "workflow_id": workflow_id,
+        "created_by": current_user.id
+    }, {"_id": 0}, sort=[("requested_at", -1)])
+    
+    if not deletion:
+        raise HTTPException(status_code=404, detail="Workflow deletion not found")
+    return WorkflowDeletionResponse(**deletion)
+
 # =============================================================================
 # API ROUTES - WORKFLOW EXECUTION
 # =============================================================================
 
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+def request_fingerprint(payload: Any) -> str:
+    """Digest of a trigger's payload, to tell a retry from a reused key"""
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+async def claim_idempotency_key(scope: str, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Claim an Idempotency-Key for this request.
+    
+    Returns ``None`` when this request owns the key and should start the run,
+    otherwise the record of the earlier request with its ``execution_id``. A
+    claim whose run never started within IDEMPOTENCY_CLAIM_SECONDS, e.g. because
+    its process died, is taken over.
+    """
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+    
+    key_id = f"{scope}:{key}"
+    now = datetime.utcnow()
+    try:
+        await db.idempotency_keys.insert_one({
+            "_id": key_id,
+            "fingerprint": fingerprint,
+            "execution_id": None,
+            "claimed_until": now + timedelta(seconds=IDEMPOTENCY_CLAIM_SECONDS),
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=IDEMPOTENCY_KEY_TTL),
+        })
+        return None
+    except DuplicateKeyError:
+        record = await db.idempotency_keys.find_one({"_id": key_id})
+    
+    if record is None:
+        # Expired between the insert and the read
+        return await claim_idempotency_key(scope, key, fingerprint)
+    if record["fingerprint"] != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different payload")
+    if record["execution_id"] is None:
+        taken = await db.idempotency_keys.update_one(
+            {"_id": key_id, "execution_id": None, "claimed_until": {"$not": {"$gte": now}}},
+            {"$set": {"claimed_until": now + timedelta(seconds=IDEMPOTENCY_CLAIM_SECONDS)}}
+        )
+        if taken.modified_count:
+            return None
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    return record
+
+async def complete_idempotency_key(scope: str, key: str, execution_id: str, response: Optional[Dict[str, Any]] = None):
+    """Record the run started for a claimed key so repeats can return it"""
+    await db.idempotency_keys.update_one(
+        {"_id": f"{scope}:{key}"},
+        {"$set": {"execution_id": execution_id, "response": response}}
+    )
+
+async def release_idempotency_key(scope: str, key: str):
+    """Give up a claimed key when its run could not be started, so the client can retry"""
+    await db.idempotency_keys.delete_one({"_id": f"{scope}:{key}", "execution_id": None})
+
 @api_router.post("/workflows/{workflow_id}/execute", response_model=ExecutionResponse)
 async def execute_workflow(
     workflow_id: str,
     input_data: Optional[Dict[str, Any]] = None,
+    save_policy: Optional[SavePolicy] = None,
+    priority: ExecutionPriority = "interactive",
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Execute a workflow"""
+    """Execute a workflow, optionally overriding what the run persists and its priority class.
+    
+    A repeated ``Idempotency-Key`` returns the execution the first request started.
+    """
     # Get workflow
     workflow_data = await db.workflows.find_one({
         "id": workflow_id,
@@ -657,10 +3364,31 @@ async def execute_workflow(
     if not workflow_data:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
+    scope = f"execute:{current_user.id}:{workflow_id}"
+    if idempotency_key is not None:
+        original = await claim_idempotency_key(scope, idempotency_key, request_fingerprint([input_data, save_policy]))
+        if original:
+            IDEMPOTENT_REPLAYS.labels("execute").inc()
+            execution = await db.executions.find_one(
+                {"id": original["execution_id"]}, {"_id": 0, "checkpoints": 0}
+            )
+            return ExecutionResponse(**(execution or original["response"]))
+    
     workflow = WorkflowResponse(**workflow_data)
     
     # Execute workflow
-    execution = await execution_engine.execute_workflow(workflow, current_user.id, input_data)
+    try:
+        execution = await execution_engine.execute_workflow(
+            workflow, current_user.id, input_data, save_policy, priority
+        )
+    except Exception:
+        if idempotency_key is not None:
+            await release_idempotency_key(scope, idempotency_key)
+        raise
+    
+    response = ExecutionResponse(**execution.dict())
+    if idempotency_key is not None:
+        await complete_idempotency_key(scope, idempotency_key, execution.id, response.dict())
     
     # Update workflow execution count
     await db.workflows.update_one(
@@ -671,7 +3399,79 @@ async def execute_workflow(
         }
     )
     
-    return ExecutionResponse(**execution.dict())
+    return response
+
+async def _read_bulk_inputs(request: Request) -> List[Optional[Dict[str, Any]]]:
+    """Parse bulk execute inputs from a JSON array or an NDJSON body"""
+    content_type = request.headers.get("content-type", "")
+    inputs = []
+    
+    if "ndjson" in content_type:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            inputs.extend(json.loads(line) for line in lines if line.strip())
+            if len(inputs) > BULK_EXECUTE_MAX:
+                break
+        if buffer.strip():
+            inputs.append(json.loads(buffer))
+    else:
+        inputs = json.loads(await request.body() or b"[]")
+        if not isinstance(inputs, list):
+            raise ValueError("Expected a JSON array of input payloads")
+    
+    if not all(input_data is None or isinstance(input_data, dict) for input_data in inputs):
+        raise ValueError("Each input payload must be an object or null")
+    
+    return inputs
+
+@api_router.post("/workflows/{workflow_id}/execute/bulk", response_model=BulkExecutionResponse)
+async def execute_workflow_bulk(
+    workflow_id: str,
+    request: Request,
+    save_policy: Optional[SavePolicy] = None,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Start one run per input payload, in the batch priority class.
+    
+    Accepts a JSON array or, with an ``application/x-ndjson`` content type,
+    one payload per line. Execution ids are returned in input order.
+    """
+    workflow_data = await db.workflows.find_one({
+        "id": workflow_id,
+        "created_by": current_user.id
+    })
+    
+    if not workflow_data:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    try:
+        inputs = await _read_bulk_inputs(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bulk input: {str(e)}")
+    
+    if len(inputs) > BULK_EXECUTE_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_EXECUTE_MAX} runs per request")
+    
+    workflow = WorkflowResponse(**workflow_data)
+    executions = await execution_engine.execute_workflow_batch(
+        workflow, current_user.id, inputs, save_policy, "batch"
+    )
+    
+    if executions:
+        await db.workflows.update_one(
+            {"id": workflow_id},
+            {
+                "$inc": {"executions": len(executions)},
+                "$set": {"last_run": datetime.utcnow()}
+            }
+        )
+    
+    return BulkExecutionResponse(
+        workflow_id=workflow_id,
+        execution_ids=[execution.id for execution in executions]
+    )
 
 @api_router.get("/workflows/{workflow_id}/executions", response_model=List[ExecutionResponse])
 async def get_workflow_executions(
@@ -691,18 +3491,132 @@ async def get_workflow_executions(
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     # Get executions
-    cursor = db.executions.find({"workflow_id": workflow_id}).sort("started_at", -1).skip(skip).limit(limit)
+    # Newest first by queue time; queued runs have no started_at yet
+    cursor = db.executions.find({"workflow_id": workflow_id}, {"checkpoints": 0}).sort("queued_at", -1).skip(skip).limit(limit)
     executions = await cursor.to_list(length=limit)
     
     return [ExecutionResponse(**execution) for execution in executions]
 
+def _empty_execution_stats() -> Dict[str, Any]:
+    return {"counts": {}, "duration_histogram": {}, "node_failures": {}, "duration_ms_sum": 0, "duration_ms_max": 0}
+
+def _merge_execution_stats(target: Dict[str, Any], rollup: Dict[str, Any]):
+    """Add one rollup's counters into an accumulated total"""
+    for field in ("counts", "duration_histogram", "node_failures"):
+        for key, value in rollup.get(field, {}).items():
+            target[field][key] = target[field].get(key, 0) + value
+    target["duration_ms_sum"] += rollup.get("duration_ms_sum", 0)
+    target["duration_ms_max"] = max(target["duration_ms_max"], rollup.get("duration_ms_max", 0))
+
+def _summarize_execution_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Derived figures for a rollup: totals, success rate and mean duration"""
+    total = sum(stats["counts"].values())
+    return {
+        **stats,
+        "total": total,
+        "success_rate": stats["counts"].get("completed", 0) / total if total else None,
+        "duration_ms_avg": stats["duration_ms_sum"] / total if total else None,
+    }
+
+@api_router.get("/workflows/{workflow_id}/stats")
+async def get_workflow_stats(
+    workflow_id: str,
+    days: int = 30,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Execution statistics of the last ``days`` days, read from the daily rollups"""
+    workflow = await db.workflows.find_one({
+        "id": workflow_id,
+        "created_by": current_user.id
+    }, {"_id": 1})
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    days = max(1, min(days, 366))
+    since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    rollups = await db.execution_stats.find(
+        {"workflow_id": workflow_id, "day": {"$gte": since}}, {"_id": 0, "workflow_id": 0}
+    ).sort("day", 1).to_list(length=days)
+    
+    totals = _empty_execution_stats()
+    daily = []
+    for rollup in rollups:
+        _merge_execution_stats(totals, rollup)
+        day = _empty_execution_stats()
+        _merge_execution_stats(day, rollup)
+        daily.append({"day": rollup["day"].strftime("%Y-%m-%d"), **_summarize_execution_stats(day)})
+    
+    return {
+        "workflow_id": workflow_id,
+        "since": since.strftime("%Y-%m-%d"),
+        "duration_buckets_ms": EXECUTION_DURATION_BUCKETS,
+        "totals": _summarize_execution_stats(totals),
+        "daily": daily,
+    }
+
+@api_router.post("/workflows/{workflow_id}/executions/restore")
+async def restore_workflow_executions(
+    workflow_id: str,
+    day: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Restore archived executions of a workflow for a day (YYYY-MM-DD)"""
+    workflow = await db.workflows.find_one({
+        "id": workflow_id,
+        "created_by": current_user.id
+    }, {"_id": 1})
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    try:
+        archive_day = datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="day must be formatted as YYYY-MM-DD")
+    
+    restored = await restore_archived_executions(workflow_id, archive_day)
+    return {"restored": restored}
+
+# Finished executions never change, so clients may keep them this long
+FINISHED_EXECUTION_MAX_AGE = 365 * 24 * 3600
+
+def execution_cache_headers(execution: Dict[str, Any]) -> Dict[str, str]:
+    """ETag and caching headers: immutable once sealed, revalidated until then"""
+    # Final logs are written after the status; the run only stops changing once sealed
+    if not execution.get("sealed") or execution.get("finished_at") is None:
+        return {"Cache-Control": "private, no-cache"}
+    return {
+        "ETag": make_etag("execution", execution["id"], execution["status"], execution["finished_at"]),
+        "Cache-Control": f"private, max-age={FINISHED_EXECUTION_MAX_AGE}, immutable",
+    }
+
 @api_router.get("/executions/{execution_id}", response_model=ExecutionResponse)
 async def get_execution(
     execution_id: str,
+    request: Request,
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get execution details"""
-    execution = await db.executions.find_one({"id": execution_id})
+    """Get execution details; finished executions carry an ETag and long-lived cache headers"""
+    if request.headers.get("if-none-match"):
+        version = await db.executions.find_one(
+            {"id": execution_id}, {"_id": 0, "id": 1, "workflow_id": 1, "status": 1, "finished_at": 1, "sealed": 1}
+        )
+        if version:
+            headers = execution_cache_headers(version)
+            if "ETag" in headers and etag_matches(request, headers["ETag"]):
+                owned = await db.workflows.find_one(
+                    {"id": version["workflow_id"], "created_by": current_user.id}, {"_id": 1}
+                )
+                if not owned:
+                    raise HTTPException(status_code=404, detail="Execution not found")
+                return Response(status_code=304, headers=headers)
+    
+    execution = await db.executions.find_one({"id": execution_id}, {"_id": 0, "checkpoints": 0})
+    
+    if not execution:
+        # Unsaved runs in progress and runs kept outside MongoDB
+        execution = await execution_engine.get_local_execution(execution_id)
     
     if not execution:
         raise HTTPException(status_code=404, detail="Execution not found")
@@ -711,12 +3625,185 @@ async def get_execution(
     workflow = await db.workflows.find_one({
         "id": execution["workflow_id"],
         "created_by": current_user.id
+    }, {"_id": 1})
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    return ORJSONResponse(
+        ExecutionResponse(**execution).dict(), headers=execution_cache_headers(execution)
+    )
+
+@api_router.post("/executions/{execution_id}/retry", response_model=ExecutionResponse)
+async def retry_execution(
+    execution_id: str,
+    save_policy: Optional[SavePolicy] = None,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Re-run a failed execution from its failed node, reusing checkpointed outputs"""
+    execution = await db.executions.find_one({"id": execution_id})
+    
+    if not execution:
+        execution = await execution_engine.get_local_execution(execution_id)
+    
+    if not execution:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    # Verify ownership through workflow
+    workflow_data = await db.workflows.find_one({
+        "id": execution["workflow_id"],
+        "created_by": current_user.id
     })
     
+    if not workflow_data:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    if execution["status"] != "failed":
+        raise HTTPException(status_code=409, detail="Only failed executions can be retried")
+    
+    workflow = WorkflowResponse(**workflow_data)
+    retry = await execution_engine.retry_execution(execution, workflow, save_policy)
+    
+    await db.workflows.update_one(
+        {"id": workflow.id},
+        {
+            "$inc": {"executions": 1},
+            "$set": {"last_run": datetime.utcnow()}
+        }
+    )
+    
+    return ExecutionResponse(**retry.dict())
+
+@api_router.get("/executions/{execution_id}/data/{kind}")
+async def get_execution_data(
+    execution_id: str,
+    kind: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Stream an execution's input or output payload"""
+    if kind not in ("input", "output"):
+        raise HTTPException(status_code=404, detail="Unknown execution data")
+    field = f"{kind}_data"
+    
+    execution = await db.executions.find_one({"id": execution_id}, {"_id": 0, "workflow_id": 1, field: 1})
+    
+    if not execution:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    # Verify ownership through workflow
+    workflow = await db.workflows.find_one({
+        "id": execution["workflow_id"],
+        "created_by": current_user.id
+    }, {"_id": 1})
+    
     if not workflow:
         raise HTTPException(status_code=404, detail="Execution not found")
     
-    return ExecutionResponse(**execution)
+    return StreamingResponse(stream_payload(execution.get(field)), media_type="application/json")
+
+# =============================================================================
+# API ROUTES - WEBHOOKS
+# =============================================================================
+
+def _webhook_output_body(output_data: Optional[Dict[str, Any]]) -> Any:
+    """Build the response body for a "lastNode" webhook from the last node's output"""
+    items = (output_data or {}).get("items") or []
+    payloads = [item.get("json", item) if isinstance(item, dict) else item for item in items]
+    return payloads[0] if len(payloads) == 1 else payloads
+
+async def _webhook_response(execution_id: str, config: Dict[str, Any]):
+    """Answer a webhook call for its run according to the node's response mode"""
+    if config.get("responseMode", "lastNode") != "lastNode":
+        return {"message": "Workflow was started", "executionId": execution_id}
+    
+    timeout = float(config.get("responseTimeout") or WEBHOOK_RESPONSE_TIMEOUT)
+    result = await execution_engine.wait_for_completion(execution_id, timeout)
+    
+    if result is None:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"message": "Workflow is still running", "executionId": execution_id}
+        )
+    
+    if result["status"] != "completed":
+        return JSONResponse(
+            status_code=500,
+            content={
+                "message": "Workflow execution failed",
+                "executionId": execution_id,
+                "error": result.get("error_message")
+            }
+        )
+    
+    return _webhook_output_body(await load_payload(result.get("output_data")))
+
+@api_router.api_route("/webhook/{node_id}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+@api_router.api_route("/webhook/{node_id}/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+async def receive_webhook(node_id: str, request: Request, path: str = ""):
+    """Webhook ingress for active workflows.
+    
+    With ``responseMode: lastNode`` the caller receives the last node's output
+    in the same response, or a 202 with the execution id once the configured
+    timeout expires. A redelivery carrying the same ``Idempotency-Key`` (or the
+    header named by ``idempotencyHeader``) is answered from the original run.
+    """
+    workflow_data = await db.workflows.find_one({
+        "nodes": {"$elemMatch": {"id": node_id, "type": "webhook"}},
+        "is_active": True
+    })
+    
+    if not workflow_data:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    
+    workflow = WorkflowResponse(**workflow_data)
+    webhook_node = next(node for node in workflow.nodes if node.id == node_id)
+    config = webhook_node.data.config
+    
+    if config.get("path") and config["path"].strip("/") != path.strip("/"):
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    
+    body = await request.body()
+    scope = f"webhook:{workflow.id}:{node_id}"
+    idempotency_key = request.headers.get(config.get("idempotencyHeader") or "Idempotency-Key")
+    if idempotency_key is not None:
+        original = await claim_idempotency_key(scope, idempotency_key, request_fingerprint(body))
+        if original:
+            IDEMPOTENT_REPLAYS.labels("webhook").inc()
+            return await _webhook_response(original["execution_id"], config)
+    
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        payload = body.decode("utf-8", errors="replace")
+    
+    input_data = {
+        "method": request.method,
+        "headers": dict(request.headers),
+        "query": dict(request.query_params),
+        "body": payload
+    }
+    
+    try:
+        execution = await execution_engine.execute_workflow(
+            workflow, workflow.created_by, input_data, priority="webhook"
+        )
+    except Exception:
+        if idempotency_key is not None:
+            await release_idempotency_key(scope, idempotency_key)
+        raise
+    
+    if idempotency_key is not None:
+        await complete_idempotency_key(scope, idempotency_key, execution.id)
+    
+    await db.workflows.update_one(
+        {"id": workflow.id},
+        {
+            "$inc": {"executions": 1},
+            "$set": {"last_run": datetime.utcnow()}
+        }
+    )
+    
+    return await _webhook_response(execution.id, config)
 
 # =============================================================================
 # API ROUTES - NODE DEFINITIONS
@@ -769,6 +3856,93 @@ async def get_node_definition(node_type: str):
         is_trigger=definition.get("isTrigger", False)
     )
 
+# =============================================================================
+# API ROUTES - DEBUG
+# =============================================================================
+
+def _sample_stacks(thread_id: int, seconds: float, interval: float) -> collections.Counter:
+    """Sample one thread's Python stack (blocking, run in a thread)"""
+    stacks = collections.Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+            frame = frame.f_back
+        if stack:
+            stacks[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return stacks
+
+@api_router.get("/debug/traces")
+async def get_debug_traces(
+    limit: int = 50,
+    admin_user: UserResponse = Depends(get_admin_user)
+):
+    """Most recent slow request traces"""
+    traces = list(slow_traces)[-limit:]
+    return {
+        "enabled": TRACING_ENABLED,
+        "slow_ms": TRACE_SLOW_MS,
+        "traces": [trace.to_dict() for trace in reversed(traces)]
+    }
+
+@api_router.post("/debug/profile", response_class=PlainTextResponse)
+async def profile_event_loop(
+    seconds: float = 5.0,
+    interval_ms: float = 5.0,
+    admin_user: UserResponse = Depends(get_admin_user)
+):
+    """Sample the event loop thread and return collapsed stacks for flame graphs"""
+    seconds = min(max(seconds, 0.1), 60.0)
+    stacks = await asyncio.to_thread(
+        _sample_stacks, threading.get_ident(), seconds, max(interval_ms, 1.0) / 1000
+    )
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+_tracemalloc_snapshot = None
+
+@api_router.post("/debug/tracemalloc")
+async def tracemalloc_control(
+    action: str = "snapshot",
+    limit: int = 25,
+    admin_user: UserResponse = Depends(get_admin_user)
+):
+    """Start, snapshot or stop tracemalloc.
+    
+    Each snapshot reports the top allocation sites and the growth since the
+    previous snapshot.
+    """
+    global _tracemalloc_snapshot
+    
+    if action == "start":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+        return {"tracing": True}
+    
+    if action == "stop":
+        tracemalloc.stop()
+        _tracemalloc_snapshot = None
+        return {"tracing": False}
+    
+    if action != "snapshot":
+        raise HTTPException(status_code=400, detail="action must be start, snapshot or stop")
+    
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not running")
+    
+    snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+    current, peak = tracemalloc.get_traced_memory()
+    top = [str(stat) for stat in snapshot.statistics("lineno")[:limit]]
+    growth = []
+    if _tracemalloc_snapshot is not None:
+        growth = [str(stat) for stat in snapshot.compare_to(_tracemalloc_snapshot, "lineno")[:limit]]
+    _tracemalloc_snapshot = snapshot
+    
+    return {"current_bytes": current, "peak_bytes": peak, "top": top, "growth": growth}
+
 # =============================================================================
 # API ROUTES - LEGACY STATUS (for existing tests)
 # =============================================================================
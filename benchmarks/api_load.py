@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for the Quantamworkforce API.
+
+Runs the FastAPI app in-process (through httpx's ASGI transport) or against a
+running server, and drives a weighted mix of login, list/get workflows,
+autosave updates, execute and execution polling from many virtual users.
+
+    # In-process against a local mongod (MONGO_URL, default localhost:27017)
+    python -m benchmarks.api_load --duration 30 --concurrency 50 --output api.json
+
+    # In-process without MongoDB (requires mongomock-motor)
+    python -m benchmarks.api_load --mongo mock
+
+    # Against a deployed server
+    python -m benchmarks.api_load --url http://localhost:8001
+
+    # Compare with a previous run
+    python -m benchmarks.api_load --compare api.json
+
+The in-process mode uses the BENCH_DB_NAME database (default
+quantamworkforce_bench) and drops it afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.common import compare_reports, load_server, new_report, summarize, write_report
+
+# Relative frequency of each operation in the mixed workload
+WORKLOAD = {
+    "login": 5,
+    "list_workflows": 25,
+    "get_workflow": 25,
+    "autosave_workflow": 25,
+    "execute_workflow": 10,
+    "poll_execution": 10,
+}
+
+
+def sample_nodes(offset: float = 0.0) -> Dict[str, List[Dict[str, Any]]]:
+    """A small trigger -> http -> function workflow, shifted to mimic autosave edits"""
+    nodes = [
+        {
+            "id": f"node-{index}",
+            "type": node_type,
+            "name": node_type,
+            "position": {"x": 200.0 * index + offset, "y": 100.0},
+            "data": {"label": node_type, "config": {}},
+        }
+        for index, node_type in enumerate(["manual-trigger", "http-request", "function"])
+    ]
+    connections = [
+        {"id": f"conn-{index}", "source": f"node-{index}", "target": f"node-{index + 1}"}
+        for index in range(len(nodes) - 1)
+    ]
+    return {"nodes": nodes, "connections": connections}
+
+
+class VirtualUser:
+    """One API client with its own account, workflows and executions"""
+
+    def __init__(self, http: httpx.AsyncClient, rng: random.Random):
+        self.http = http
+        self.rng = rng
+        self.email = f"bench_{uuid.uuid4().hex[:12]}@example.com"
+        self.password = "benchmark-password"
+        self.headers: Dict[str, str] = {}
+        self.workflow_ids: List[str] = []
+        self.execution_ids: List[str] = []
+
+    async def setup(self, workflows: int):
+        response = await self.http.post(
+            "/api/auth/register",
+            json={"name": "Bench User", "email": self.email, "password": self.password},
+        )
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for index in range(workflows):
+            response = await self.http.post(
+                "/api/workflows", json={"name": f"Bench workflow {index}"}, headers=self.headers
+            )
+            response.raise_for_status()
+            workflow_id = response.json()["id"]
+            response = await self.http.put(
+                f"/api/workflows/{workflow_id}", json=sample_nodes(), headers=self.headers
+            )
+            response.raise_for_status()
+            self.workflow_ids.append(workflow_id)
+
+    async def run(self, operation: str) -> httpx.Response:
+        workflow_id = self.rng.choice(self.workflow_ids)
+
+        if operation == "login":
+            return await self.http.post("/api/auth/login", json={"email": self.email, "password": self.password})
+        if operation == "list_workflows":
+            return await self.http.get("/api/workflows", headers=self.headers)
+        if operation == "get_workflow":
+            return await self.http.get(f"/api/workflows/{workflow_id}", headers=self.headers)
+        if operation == "autosave_workflow":
+            return await self.http.put(
+                f"/api/workflows/{workflow_id}",
+                json=sample_nodes(offset=self.rng.random() * 50),
+                headers=self.headers,
+            )
+        if operation == "execute_workflow":
+            response = await self.http.post(f"/api/workflows/{workflow_id}/execute", headers=self.headers)
+            if response.status_code == 200:
+                self.execution_ids.append(response.json()["id"])
+            return response
+        if operation == "poll_execution":
+            if not self.execution_ids:
+                return await self.http.get(f"/api/workflows/{workflow_id}/executions", headers=self.headers)
+            execution_id = self.rng.choice(self.execution_ids[-20:])
+            return await self.http.get(f"/api/executions/{execution_id}", headers=self.headers)
+        raise ValueError(f"Unknown operation {operation}")
+
+
+async def drive(user: VirtualUser, deadline: float, latencies, errors):
+    """Issue operations back to back until the deadline"""
+    operations = list(WORKLOAD)
+    weights = [WORKLOAD[operation] for operation in operations]
+    while time.perf_counter() < deadline:
+        operation = user.rng.choices(operations, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await user.run(operation)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        latencies[operation].append(time.perf_counter() - started)
+        if failed:
+            errors[operation] += 1
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    server = None
+    if args.url:
+        transport = None
+        base_url = args.url.rstrip("/")
+    else:
+        server = load_server(args.mongo)
+        transport = httpx.ASGITransport(app=server.app)
+        base_url = "http://bench"
+
+    report = new_report("api_load", {
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "workflows_per_user": args.workflows,
+        "target": args.url or f"in-process ({args.mongo})",
+        "workload": WORKLOAD,
+    })
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as http:
+        lifespan = server.app.router.lifespan_context(server.app) if server else None
+        if lifespan:
+            await lifespan.__aenter__()
+        try:
+            rng = random.Random(args.seed)
+            users = [VirtualUser(http, random.Random(rng.random())) for _ in range(args.concurrency)]
+            await asyncio.gather(*(user.setup(args.workflows) for user in users))
+
+            latencies = defaultdict(list)
+            errors = defaultdict(int)
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                drive(user, started + args.duration, latencies, errors) for user in users
+            ))
+            elapsed = time.perf_counter() - started
+
+            for operation in WORKLOAD:
+                report["results"][operation] = summarize(latencies[operation], errors[operation], elapsed)
+            report["results"]["total"] = summarize(
+                [value for values in latencies.values() for value in values], sum(errors.values()), elapsed
+            )
+        finally:
+            if server:
+                for task in list(server.execution_engine.executing_workflows.values()):
+                    task.cancel()
+                await server.client.drop_database(server.db.name)
+                await lifespan.__aexit__(None, None, None)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--mongo", choices=["local", "mock"], default="local",
+                        help="Database for in-process runs (default: local mongod)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured load")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--workflows", type=int, default=5, help="Workflows created per user")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the operation mix")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to compare p95 latency against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    write_report(report, args.output)
+    if args.compare:
+        print("\n".join(compare_reports(report, args.compare, "p95_ms")))
+
+
+if __name__ == "__main__":
+    main()
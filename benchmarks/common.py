@@ -0,0 +1,112 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = REPO_ROOT / "backend"
+
+
+def load_server(mongo: str = "local"):
+    """Import the backend app for in-process benchmarking.
+
+    ``mongo="local"`` talks to the MongoDB at ``MONGO_URL`` (default
+    ``mongodb://localhost:27017``) using the throwaway ``BENCH_DB_NAME``
+    database. ``mongo="mock"`` swaps in mongomock-motor so the suite runs
+    without a mongod; numbers then reflect application overhead only.
+    """
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "quantamworkforce_bench")
+    for path in (str(REPO_ROOT), str(BACKEND_DIR)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    import server
+
+    if mongo == "mock":
+        from mongomock_motor import AsyncMongoMockClient
+
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[os.environ["DB_NAME"]]
+        # Objects built at import time hold the real database; rebuild them on the mock
+        server.blob_store = server.GridFSBlobStore(server.db)
+        server.execution_engine.store = server.create_execution_store()
+
+    return server
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int = 0, duration: Optional[float] = None) -> Dict[str, Any]:
+    """Latency summary in milliseconds, plus throughput when a duration is given"""
+    values = sorted(latencies)
+    summary = {
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+    if duration:
+        summary["throughput_rps"] = round(len(values) / duration, 2)
+    return summary
+
+
+def git_revision() -> Optional[str]:
+    """Current commit of the repository, if available"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_report(name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Report skeleton shared by every benchmark"""
+    return {
+        "benchmark": name,
+        "revision": git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "config": config,
+        "results": {},
+    }
+
+
+def write_report(report: Dict[str, Any], output: Optional[str]):
+    """Write a report as JSON to a file, or to stdout"""
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        Path(output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+def compare_reports(current: Dict[str, Any], baseline_path: str, metric: str) -> List[str]:
+    """Lines describing how each result's metric moved against a baseline report"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    lines = [f"Compared with {baseline.get('revision') or baseline_path}:"]
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name, {}).get(metric)
+        value = result.get(metric)
+        if previous is None or value is None:
+            continue
+        change = (value - previous) / previous * 100 if previous else 0.0
+        lines.append(f"  {name:<32} {metric} {previous:>10} -> {value:>10} ({change:+.1f}%)")
+    return lines
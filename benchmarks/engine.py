@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for WorkflowExecutionEngine on synthetic DAGs.
+
+Nodes run through a no-op executor and execution records are kept in an
+InMemoryExecutionStore, so the numbers isolate the engine's own scheduling
+and bookkeeping from MongoDB and from the simulated node delays.
+
+    python -m benchmarks.engine --output engine.json
+    python -m benchmarks.engine --quick
+    python -m benchmarks.engine --compare engine.json
+
+Reports, per graph shape and size, the scheduling overhead per node
+execution and the peak memory of one execution, and the executions per
+second of a small workflow at several concurrency levels, with no
+admission cap so that each level's runs are all in flight at once.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.common import compare_reports, load_server, new_report, write_report
+
+
+def make_workflow(server, nodes: List[Tuple[str, str]], edges: List[Tuple[str, str]]):
+    """Build a WorkflowResponse from (id, type) nodes and (source, target) edges"""
+    now = server.datetime.utcnow()
+    return server.WorkflowResponse(
+        id=f"bench-{len(nodes)}-{len(edges)}",
+        name="benchmark",
+        nodes=[
+            {"id": node_id, "type": node_type, "name": node_id,
+             "position": {"x": 0.0, "y": 0.0}, "data": {"label": node_id}}
+            for node_id, node_type in nodes
+        ],
+        connections=[
+            {"id": f"e{index}", "source": source, "target": target}
+            for index, (source, target) in enumerate(edges)
+        ],
+        created_at=now,
+        updated_at=now,
+        created_by="benchmark",
+    )
+
+
+def chain(size: int):
+    """trigger -> n1 -> n2 -> ... (size nodes)"""
+    nodes = [("n0", "manual-trigger")] + [(f"n{index}", "function") for index in range(1, size)]
+    edges = [(f"n{index}", f"n{index + 1}") for index in range(size - 1)]
+    return nodes, edges
+
+
+def fanout(size: int):
+    """trigger connected directly to size - 1 leaves"""
+    nodes = [("n0", "manual-trigger")] + [(f"n{index}", "function") for index in range(1, size)]
+    edges = [("n0", f"n{index}") for index in range(1, size)]
+    return nodes, edges
+
+
+def diamond(width: int):
+    """trigger -> width branches -> join -> 10-node tail; the join runs once per branch"""
+    nodes = [("start", "manual-trigger"), ("join", "function")]
+    edges = []
+    for index in range(width):
+        nodes.append((f"b{index}", "function"))
+        edges += [("start", f"b{index}"), (f"b{index}", "join")]
+    previous = "join"
+    for index in range(10):
+        nodes.append((f"t{index}", "function"))
+        edges.append((previous, f"t{index}"))
+        previous = f"t{index}"
+    return nodes, edges
+
+
+def random_tree(size: int, seed: int = 7):
+    """Random tree rooted at the trigger; every node has one parent"""
+    rng = random.Random(seed)
+    nodes = [("n0", "manual-trigger")] + [(f"n{index}", "function") for index in range(1, size)]
+    edges = [(f"n{rng.randrange(index)}", f"n{index}") for index in range(1, size)]
+    return nodes, edges
+
+
+SHAPES = {"chain": chain, "fanout": fanout, "diamond": diamond, "tree": random_tree}
+FULL_CASES = [("chain", 100), ("chain", 1000), ("chain", 10000), ("fanout", 1000), ("fanout", 10000),
+              ("diamond", 100), ("diamond", 1000), ("tree", 10000), ("tree", 50000)]
+QUICK_CASES = [("chain", 100), ("chain", 10000), ("fanout", 10000), ("diamond", 100), ("tree", 10000)]
+
+
+class NoOpExecutor:
+    """Node executor that only counts how many nodes ran"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, node, items):
+        self.calls += 1
+        return items
+
+
+async def run_once(engine, workflow) -> Dict[str, Any]:
+    execution = await engine.execute_workflow(workflow, "benchmark", {"value": 1})
+    result = await engine.wait_for_completion(execution.id, timeout=3600)
+    if result is None or result["status"] != "completed":
+        raise RuntimeError(f"Benchmark execution did not complete: {result}")
+    return result
+
+
+async def bench_graph(server, shape: str, size: int, repeat: int) -> Dict[str, Any]:
+    """Per-node overhead and peak memory for one graph shape"""
+    workflow = make_workflow(server, *SHAPES[shape](size))
+    executor = NoOpExecutor()
+    engine = server.WorkflowExecutionEngine(node_executor=executor, store=server.InMemoryExecutionStore())
+
+    timings = []
+    for _ in range(repeat):
+        executor.calls = 0
+        started = time.perf_counter()
+        await run_once(engine, workflow)
+        timings.append(time.perf_counter() - started)
+    node_executions = executor.calls
+
+    engine.store = server.InMemoryExecutionStore()
+    tracemalloc.start()
+    await run_once(engine, workflow)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "nodes": len(workflow.nodes),
+        "edges": len(workflow.connections),
+        "node_executions": node_executions,
+        "execution_ms": round(best * 1000, 3),
+        "per_node_us": round(best / node_executions * 1e6, 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+async def bench_throughput(server, concurrency: int, executions: int) -> Dict[str, Any]:
+    """Executions per second of a 10-node chain with a bounded number in flight.
+
+    The engine's admission cap (ENGINE_MAX_CONCURRENCY, 100 by default) is
+    lifted so that levels above it measure the engine rather than its queue.
+    """
+    workflow = make_workflow(server, *chain(10))
+    engine = server.WorkflowExecutionEngine(node_executor=NoOpExecutor(), store=server.InMemoryExecutionStore())
+    engine.admission.max_running = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await run_once(engine, workflow)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(executions)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "executions": executions,
+        "executions_per_second": round(executions / elapsed, 1),
+    }
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    server = load_server("local")
+    cases = QUICK_CASES if args.quick else FULL_CASES
+    concurrency_levels = [1, 10, 100] if args.quick else [1, 10, 100, 1000]
+
+    report = new_report("engine", {
+        "repeat": args.repeat,
+        "cases": cases,
+        "concurrency_levels": concurrency_levels,
+        "throughput_executions": args.executions,
+    })
+
+    for shape, size in cases:
+        report["results"][f"{shape}_{size}"] = await bench_graph(server, shape, size, args.repeat)
+    for concurrency in concurrency_levels:
+        report["results"][f"throughput_c{concurrency}"] = await bench_throughput(
+            server, concurrency, args.executions
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller set of cases")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per graph (best is reported)")
+    parser.add_argument("--executions", type=int, default=2000, help="Executions per throughput level")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to compare per-node overhead against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    write_report(report, args.output)
+    if args.compare:
+        print("\n".join(compare_reports(report, args.compare, "per_node_us")))
+
+
+if __name__ == "__main__":
+    main()
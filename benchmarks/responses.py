@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark of large workflow responses.
+
+Measures GET /api/workflows and GET /api/workflows/{id} end to end on
+workflows with hundreds of nodes, and compares the two serialization
+strategies in isolation:
+
+* ``validated``: build a WorkflowResponse, validate it again as FastAPI does
+  for ``response_model`` and encode with the stdlib json module.
+* ``trusted``: shape the stored document with the response defaults and
+  encode with orjson (what the endpoints do).
+
+    python -m benchmarks.responses --nodes 500 --output responses.json
+    python -m benchmarks.responses --mongo mock
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict
+
+import httpx
+from pydantic import TypeAdapter
+
+from benchmarks.api_load import sample_nodes
+from benchmarks.common import compare_reports, load_server, new_report, summarize, write_report
+
+
+def large_workflow(nodes: int) -> Dict[str, Any]:
+    """Nodes and connections for a chain of the given length with realistic config"""
+    template = sample_nodes()["nodes"]
+    workflow_nodes = []
+    for index in range(nodes):
+        node = json.loads(json.dumps(template[index % len(template)]))
+        node["id"] = f"node-{index}"
+        node["position"] = {"x": 180.0 * index, "y": 120.0 * (index % 7)}
+        node["data"]["config"] = {"url": f"https://example.com/api/{index}", "method": "GET", "retries": 3}
+        node["data"]["properties"] = {"notes": "generated by benchmarks.responses"}
+        workflow_nodes.append(node)
+    connections = [
+        {"id": f"conn-{index}", "source": f"node-{index}", "target": f"node-{index + 1}"}
+        for index in range(nodes - 1)
+    ]
+    return {"nodes": workflow_nodes, "connections": connections}
+
+
+def time_calls(function: Callable[[], Any], iterations: int):
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def bench_serialization(server, document: Dict[str, Any], list_size: int, iterations: int) -> Dict[str, Any]:
+    """Serialization cost of one workflow and of a page of workflows"""
+    single = TypeAdapter(server.WorkflowResponse)
+    many = TypeAdapter(list[server.WorkflowResponse])
+    documents = [dict(document, id=f"{document['id']}-{index}") for index in range(list_size)]
+
+    def validated_one():
+        model = single.validate_python(server.WorkflowResponse(**document))
+        return json.dumps(single.dump_python(model, mode="json")).encode("utf-8")
+
+    def validated_many():
+        models = many.validate_python([server.WorkflowResponse(**item) for item in documents])
+        return json.dumps(many.dump_python(models, mode="json")).encode("utf-8")
+
+    def trusted_one():
+        return server.ORJSONResponse(server.workflow_response_document(document)).body
+
+    def trusted_many():
+        return server.ORJSONResponse([server.workflow_response_document(item) for item in documents]).body
+
+    return {
+        "serialize_one_validated": time_calls(validated_one, iterations),
+        "serialize_one_trusted": time_calls(trusted_one, iterations),
+        f"serialize_{list_size}_validated": time_calls(validated_many, max(1, iterations // 10)),
+        f"serialize_{list_size}_trusted": time_calls(trusted_many, max(1, iterations // 10)),
+    }
+
+
+async def bench_endpoints(server, args) -> Dict[str, Any]:
+    """End-to-end latency of the two read endpoints through the ASGI app"""
+    transport = httpx.ASGITransport(app=server.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+        response = await http.post("/api/auth/register", json={
+            "name": "Bench User", "email": "responses_bench@example.com", "password": "benchmark-password"
+        })
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        body = large_workflow(args.nodes)
+        workflow_ids = []
+        for index in range(args.workflows):
+            response = await http.post("/api/workflows", json={"name": f"Large {index}"}, headers=headers)
+            workflow_id = response.json()["id"]
+            await http.put(f"/api/workflows/{workflow_id}", json=body, headers=headers)
+            workflow_ids.append(workflow_id)
+
+        for name, url in (
+            ("get_workflow", f"/api/workflows/{workflow_ids[0]}"),
+            ("list_workflows", f"/api/workflows?limit={args.workflows}"),
+        ):
+            latencies = []
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                response = await http.get(url, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+            results[name] = summarize(latencies)
+            results[name]["response_bytes"] = len(response.content)
+
+        stored = await server.db.workflows.find_one({"id": workflow_ids[0]}, server.WORKFLOW_RESPONSE_PROJECTION)
+    return results, stored
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    server = load_server(args.mongo)
+    report = new_report("responses", {
+        "nodes": args.nodes,
+        "workflows": args.workflows,
+        "iterations": args.iterations,
+        "mongo": args.mongo,
+    })
+
+    async with server.app.router.lifespan_context(server.app):
+        try:
+            endpoint_results, stored = await bench_endpoints(server, args)
+            report["results"].update(endpoint_results)
+            report["results"].update(bench_serialization(server, stored, args.workflows, args.iterations))
+        finally:
+            await server.client.drop_database(server.db.name)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", choices=["local", "mock"], default="local",
+                        help="Database for the in-process app (default: local mongod)")
+    parser.add_argument("--nodes", type=int, default=500, help="Nodes per workflow")
+    parser.add_argument("--workflows", type=int, default=20, help="Workflows in the listed page")
+    parser.add_argument("--iterations", type=int, default=50, help="Requests per endpoint")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to compare p50 latency against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    write_report(report, args.output)
+    if args.compare:
+        print("\n".join(compare_reports(report, args.compare, "p50_ms")))
+
+
+if __name__ == "__main__":
+    main()
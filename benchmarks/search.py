@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Workflow search and listing benchmark against a real MongoDB.
+
+Seeds one tenant with many workflows (100k by default) in the BENCH_DB_NAME
+database at MONGO_URL, creates the app's indexes, then times GET /workflows
+in-process for text searches, tag filters, sorted listings and keyset page
+walks. Text search needs a real mongod; mongomock has no ``$text``.
+
+    python -m benchmarks.search --output search.json
+    python -m benchmarks.search --workflows 20000 --requests 50
+    python -m benchmarks.search --compare search.json
+
+Each result also records the winning plan and whether MongoDB had to sort
+in memory. Listings and tag filters should be served in index order;
+searches always end in a top-k sort on the text score, which this measures
+at scale. The database is dropped afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.common import compare_reports, load_server, new_report, summarize, write_report
+
+WORDS = ["invoice", "slack", "sync", "report", "github", "backup", "lead", "order", "crm", "alert",
+         "daily", "weekly", "customer", "payment", "ticket", "deploy", "email", "sheet", "webhook", "export"]
+TAGS = ["sales", "ops", "finance", "marketing", "support", "engineering", "hr", "legal"]
+
+
+def seed_documents(user_id: str, start: int, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Workflow documents shaped like the app's, with varied names, tags and timestamps"""
+    now = datetime.utcnow()
+    documents = []
+    for index in range(start, start + count):
+        updated_at = now - timedelta(minutes=rng.randrange(60 * 24 * 365))
+        documents.append({
+            "id": f"wf-{index:07d}",
+            "name": " ".join(rng.sample(WORDS, 3)) + f" {index}",
+            "description": " ".join(rng.sample(WORDS, 6)),
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+            "nodes": [],
+            "connections": [],
+            "is_active": False,
+            "revision": 1,
+            "executions": 0,
+            "last_run": updated_at if rng.random() < 0.5 else None,
+            "created_at": updated_at,
+            "updated_at": updated_at,
+            "created_by": user_id,
+        })
+    return documents
+
+
+# name -> GET /workflows query parameters
+QUERIES = {
+    "list_default": {},
+    "search_common_word": {"q": "invoice"},
+    "search_two_words": {"q": "slack report"},
+    "search_rare_term": {"q": "7777"},
+    "tag_filter": {"tags": "finance"},
+    "tag_filter_two": {"tags": ["finance", "ops"]},
+    "sort_updated_at": {"sort": "updated_at"},
+    "sort_last_run": {"sort": "last_run"},
+    "search_and_tag": {"q": "payment", "tags": "sales"},
+}
+
+
+def query_filter(user_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """The MongoDB filter the route builds for these parameters"""
+    query: Dict[str, Any] = {"created_by": user_id}
+    if "q" in params:
+        query["$text"] = {"$search": params["q"]}
+    if "tags" in params:
+        tags = params["tags"] if isinstance(params["tags"], list) else [params["tags"]]
+        query["tags"] = {"$all": tags}
+    return query
+
+
+def plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for child in plan.get("inputStages", []) + ([plan["inputStage"]] if "inputStage" in plan else []):
+        stages += plan_stages(child)
+    return stages
+
+
+async def explain(server, user_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Winning plan stages of the query behind a request"""
+    query = query_filter(user_id, params)
+    if "q" in params:
+        command = {"aggregate": "workflows", "cursor": {}, "pipeline": [
+            {"$match": query}, {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$sort": {"score": -1, "id": -1}}, {"$limit": 101},
+        ]}
+    else:
+        command = {"find": "workflows", "filter": query, "limit": 101}
+        if "sort" in params or "tags" in params:
+            command["sort"] = {params.get("sort", "updated_at"): -1, "id": -1}
+    result = await server.db.command({"explain": command, "verbosity": "queryPlanner"})
+    planner = result.get("queryPlanner") or result.get("stages", [{}])[0].get("$cursor", {}).get("queryPlanner", {})
+    stages = plan_stages(planner.get("winningPlan", {}))
+    # Aggregations list the stages that run after the query separately
+    stages += [next(iter(stage)) for stage in result.get("stages", [])[1:]]
+    return {"plan": stages, "sort_in_memory": "SORT" in stages or "$sort" in stages}
+
+
+async def timed(http: httpx.AsyncClient, headers: Dict[str, str], params: Dict[str, Any], requests: int):
+    latencies = []
+    errors = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await http.get("/api/workflows", params={**params, "limit": 100}, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        errors += response.status_code != 200
+    return latencies, errors
+
+
+async def walk_pages(http: httpx.AsyncClient, headers: Dict[str, str], params: Dict[str, Any], pages: int):
+    """Follow X-Next-Cursor for up to ``pages`` pages; returns per-page latencies and rows seen"""
+    latencies = []
+    seen = set()
+    cursor = None
+    for _ in range(pages):
+        started = time.perf_counter()
+        response = await http.get(
+            "/api/workflows", params={**params, "limit": 100, **({"cursor": cursor} if cursor else {})},
+            headers=headers
+        )
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        seen.update(workflow["id"] for workflow in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    return latencies, len(seen)
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    server = load_server("local")
+    report = new_report("search", {
+        "workflows": args.workflows,
+        "requests": args.requests,
+        "pages": args.pages,
+    })
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as http:
+        lifespan = server.app.router.lifespan_context(server.app)
+        await lifespan.__aenter__()
+        try:
+            response = await http.post("/api/auth/register", json={
+                "name": "Search Bench", "email": "search-bench@example.com", "password": "benchmark-password"
+            })
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            user_id = (await http.get("/api/auth/me", headers=headers)).json()["id"]
+
+            rng = random.Random(args.seed)
+            for offset in range(0, args.workflows, 10000):
+                batch = seed_documents(user_id, offset, min(10000, args.workflows - offset), rng)
+                await server.db.workflows.insert_many(batch, ordered=False)
+            await server.ensure_indexes()
+
+            for name, params in QUERIES.items():
+                latencies, errors = await timed(http, headers, params, args.requests)
+                report["results"][name] = {**summarize(latencies, errors), **await explain(server, user_id, params)}
+            for name, params in (("pages_search", {"q": "report"}), ("pages_updated_at", {"sort": "updated_at"})):
+                latencies, rows = await walk_pages(http, headers, params, args.pages)
+                report["results"][name] = {**summarize(latencies), "rows": rows}
+        finally:
+            await server.client.drop_database(server.db.name)
+            await lifespan.__aexit__(None, None, None)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", type=int, default=100000, help="Workflows seeded for the tenant")
+    parser.add_argument("--requests", type=int, default=20, help="Timed requests per query")
+    parser.add_argument("--pages", type=int, default=20, help="Pages followed by the cursor walks")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the seeded workflows")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to compare p95 latency against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    write_report(report, args.output)
+    if args.compare:
+        print("\n".join(compare_reports(report, args.compare, "p95_ms")))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,46 @@ set -e
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
 echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
-BACKEND_PID=$!
-
-echo "Waiting for backend to start..."
-sleep 30
+# Shared directory for Prometheus samples from every worker process
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
+# Workers only share events, cache invalidations and in-flight runs through REDIS_URL:
+# one worker per core with it, a single worker without it
+if [ -n "$REDIS_URL" ]; then
+    WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(nproc)}"
+else
+    WEB_CONCURRENCY="${WEB_CONCURRENCY:-1}"
+    if [ "$WEB_CONCURRENCY" -gt 1 ]; then
+        echo "WEB_CONCURRENCY=$WEB_CONCURRENCY needs REDIS_URL so workers share state, exiting"
+        exit 1
+    fi
 fi
+export WEB_CONCURRENCY
+
+# Only nginx reaches Uvicorn, which keeps /metrics off the public listener
+uvicorn server:app --host 127.0.0.1 --port 8001 --workers "$WEB_CONCURRENCY" &
+BACKEND_PID=$!
+
+# Wait until the API answers its health check (it only listens once startup is done)
+echo "Waiting for backend to become ready..."
+STARTUP_TIMEOUT="${STARTUP_TIMEOUT:-60}"
+elapsed=0
+until wget -q -O /dev/null http://127.0.0.1:8001/api/health 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ "$elapsed" -ge "$STARTUP_TIMEOUT" ]; then
+        echo "Backend not ready after ${STARTUP_TIMEOUT}s, exiting"
+        kill $BACKEND_PID
+        exit 1
+    fi
+    sleep 1
+    elapsed=$((elapsed + 1))
+done
+echo "Backend ready"
 
 # Start Nginx
 nginx -g 'daemon off;' &
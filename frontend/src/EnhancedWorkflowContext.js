@@ -525,8 +525,8 @@ export function EnhancedWorkflowProvider({ children }) {
             });
           });
 
-          // Check if execution is still running
-          if (updatedExecution.status === 'running') {
+          // Check if execution is still waiting or running
+          if (updatedExecution.status === 'queued' || updatedExecution.status === 'running') {
             setTimeout(pollExecution, 1000); // Poll every second
           } else {
             dispatch({ type: ACTIONS.FINISH_EXECUTION });
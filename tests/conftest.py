@@ -0,0 +1,30 @@
+"""
+Shared fixtures: the backend app imported against mongomock instead of MongoDB
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+@pytest.fixture(scope="session")
+def server():
+    """The ``server`` module with its database, blob store and execution store on mongomock"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "quantamworkforce_test")
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import server as backend
+    from mongomock_motor import AsyncMongoMockClient
+
+    backend.client = AsyncMongoMockClient()
+    backend.db = backend.client[os.environ["DB_NAME"]]
+    # Objects built at import time hold the real database; rebuild them on the mock
+    backend.blob_store = backend.GridFSBlobStore(backend.db)
+    backend.execution_engine.store = backend.create_execution_store()
+    return backend
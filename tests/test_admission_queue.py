@@ -0,0 +1,58 @@
+"""
+Fair admission of queued executions
+"""
+
+import collections
+
+import pytest
+
+
+def test_admission_queue_shares_capacity_by_class_weight(server):
+    admitted = []
+    queue = server.AdmissionQueue(max_running=1, weights={"interactive": 4.0, "batch": 1.0})
+    for user in range(20):
+        for _ in range(10):
+            queue.submit("batch", f"batch-{user}", lambda: admitted.append("batch"))
+    for _ in range(100):
+        queue.submit("interactive", "alice", lambda: admitted.append("interactive"))
+
+    # The first submission was admitted straight away
+    for _ in range(100):
+        queue.release()
+    shares = collections.Counter(admitted[1:101])
+    assert shares["interactive"] == pytest.approx(80, abs=2)
+
+
+def test_admission_queue_shares_a_class_equally_between_users(server):
+    admitted = []
+    queue = server.AdmissionQueue(max_running=1)
+    for _ in range(30):
+        queue.submit("batch", "heavy", lambda: admitted.append("heavy"))
+    for _ in range(5):
+        queue.submit("batch", "light", lambda: admitted.append("light"))
+
+    for _ in range(10):
+        queue.release()
+    assert collections.Counter(admitted[1:11]) == {"heavy": 5, "light": 5}
+
+
+def test_admission_queue_without_limit_admits_everything(server):
+    admitted = []
+    queue = server.AdmissionQueue(max_running=0)
+    for index in range(500):
+        queue.submit("batch", f"user-{index % 7}", lambda: admitted.append(1))
+    assert len(admitted) == queue.running == 500
+
+
+@pytest.mark.parametrize("value, weights", [
+    ("interactive=8,webhook=4,batch=1", {"interactive": 8.0, "webhook": 4.0, "batch": 1.0}),
+    (" interactive=2 , ,batch=1,", {"interactive": 2.0, "batch": 1.0}),
+])
+def test_priority_weights_parse(server, value, weights):
+    assert server.parse_priority_weights(value) == weights
+
+
+@pytest.mark.parametrize("value", ["interactive", "batch=0", "=3", "batch=fast", "batch=-1"])
+def test_priority_weights_reject_malformed_entries(server, value):
+    with pytest.raises(ValueError, match="EXECUTION_PRIORITY_WEIGHTS"):
+        server.parse_priority_weights(value)
@@ -0,0 +1,92 @@
+"""
+Keyset pagination of workflow listings
+"""
+
+import asyncio
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+
+@pytest.mark.parametrize("value", [datetime(2026, 3, 1, 12, 30, 15, 250), None, 1.375])
+def test_page_cursor_round_trip(server, value):
+    cursor = server._encode_page_cursor(value, "workflow-1")
+    assert server._decode_page_cursor(cursor) == (value, "workflow-1")
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!", raw_cursor({"not": "a list"}), raw_cursor(["yesterday", "w"]), raw_cursor([[], "w"]),
+])
+def test_page_cursor_rejects_garbage(server, cursor):
+    with pytest.raises(server.HTTPException) as error:
+        server._decode_page_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+async def _client_for_new_user(server, http):
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    response = await http.post("/api/auth/register", json={"name": "Pager", "email": email, "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    user_id = (await http.get("/api/auth/me", headers=headers)).json()["id"]
+    return headers, user_id
+
+
+def test_cursor_walk_visits_every_workflow_once_in_order(server):
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            headers, user_id = await _client_for_new_user(server, http)
+            now = datetime(2026, 1, 1)
+            # Ties on last_run and runs that never happened (null) must page cleanly too
+            await server.db.workflows.insert_many([{
+                "id": f"wf-{index:03d}", "name": f"Workflow {index}", "nodes": [], "connections": [],
+                "tags": ["even"] if index % 2 == 0 else [], "created_by": user_id,
+                "created_at": now, "updated_at": now + timedelta(minutes=index),
+                "last_run": None if index % 3 == 0 else now + timedelta(hours=index // 4),
+            } for index in range(95)])
+
+            for params in ({"sort": "last_run"}, {"sort": "updated_at"}, {"tags": "even"}):
+                seen = []
+                cursor = None
+                while True:
+                    response = await http.get(
+                        "/api/workflows", headers=headers,
+                        params={**params, "limit": 10, **({"cursor": cursor} if cursor else {})}
+                    )
+                    assert response.status_code == 200
+                    seen += response.json()
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+
+                sort = params.get("sort", "updated_at")
+                expected = await server.db.workflows.find(
+                    {"created_by": user_id, **({"tags": "even"} if "tags" in params else {})}
+                ).to_list(None)
+                expected.sort(key=lambda workflow: (workflow[sort] is not None, workflow[sort] or now, workflow["id"]),
+                              reverse=True)
+                assert [workflow["id"] for workflow in seen] == [workflow["id"] for workflow in expected]
+
+    asyncio.run(scenario())
+
+
+def test_search_rejects_sort_and_listing_rejects_search_cursor(server):
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            headers, _ = await _client_for_new_user(server, http)
+            response = await http.get("/api/workflows", headers=headers, params={"q": "invoice", "sort": "last_run"})
+            assert response.status_code == 400
+            cursor = server._encode_page_cursor(2.5, "wf-001")
+            response = await http.get("/api/workflows", headers=headers, params={"sort": "updated_at", "cursor": cursor})
+            assert response.status_code == 400
+
+    asyncio.run(scenario())
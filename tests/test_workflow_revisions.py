@@ -0,0 +1,98 @@
+"""
+Workflow revision deltas and compaction
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def node(node_id, **fields):
+    return {"id": node_id, "type": "set", "data": {"label": node_id}, **fields}
+
+
+GRAPHS = [
+    [],
+    [node("a")],
+    [node("a"), node("b")],
+    [node("a", data={"label": "renamed"}), node("b")],
+    [node("b"), node("a", data={"label": "renamed"})],
+    [node("b"), node("c"), node("a", data={"label": "renamed"})],
+    [node("c")],
+    [node("d"), node("c", position={"x": 1, "y": 2})],
+]
+
+
+@pytest.mark.parametrize("old", GRAPHS)
+@pytest.mark.parametrize("new", GRAPHS)
+def test_graph_delta_round_trip(server, old, new):
+    delta = server.diff_graph_items(old, new)
+    assert server.apply_graph_delta(old, delta) == new
+    if old == new:
+        assert delta is None
+
+
+def test_graph_delta_keeps_order_only_when_needed(server):
+    assert "order" not in server.diff_graph_items([node("a")], [node("a"), node("b")])
+    assert server.diff_graph_items([node("a"), node("b")], [node("b"), node("a")]) == {"order": ["b", "a"]}
+
+
+def test_graph_delta_patches_changed_fields_only(server):
+    delta = server.diff_graph_items([node("a")], [node("a", position={"x": 3})])
+    assert delta == {"patch": [{"id": "a", "position": {"x": 3}}]}
+
+
+def test_graph_delta_records_dropped_fields(server):
+    delta = server.diff_graph_items([node("a", position={"x": 3})], [node("a")])
+    assert delta == {"unset": [{"id": "a", "fields": ["position"]}]}
+
+
+async def _record_history(server, workflow_id, graphs, start, previous=None, first_revision=1):
+    """Record one revision per graph, eight hours apart from ``start``"""
+    for offset, nodes in enumerate(graphs):
+        graph = {"nodes": nodes, "connections": []}
+        delta = None if previous is None else server.diff_workflow_graph(previous, graph)
+        await server.record_workflow_revision(
+            workflow_id, first_revision + offset, "user", graph, delta or {},
+            start + timedelta(hours=offset * 8)
+        )
+        previous = graph
+    return previous
+
+
+async def _load_all(server, workflow_id):
+    revisions = await server.db.workflow_revisions.distinct("revision", {"workflow_id": workflow_id})
+    return {revision: await server.load_workflow_revision(workflow_id, revision) for revision in revisions}
+
+
+def test_compaction_keeps_remaining_revisions_rebuildable(server):
+    async def scenario():
+        workflow_id = str(uuid.uuid4())
+        start = datetime(2026, 1, 1)
+        history = [GRAPHS[index % len(GRAPHS)] for index in range(1, 13)]
+        last = await _record_history(server, workflow_id, history, start)
+        before = await _load_all(server, workflow_id)
+
+        cutoff = start + timedelta(days=2)
+        removed = await server.compact_workflow_revisions(workflow_id, cutoff)
+        after = await _load_all(server, workflow_id)
+        assert removed == len(before) - len(after) > 0
+        assert all(after[revision] == before[revision] for revision in after)
+
+        watermark = await server.db.workflow_revision_compactions.find_one({"_id": workflow_id})
+        assert watermark["revision"] == max(
+            revision for revision in before if start + timedelta(hours=(revision - 1) * 8) < cutoff
+        )
+
+        # A later pass starts from the watermark and still rebuilds the same graphs
+        await _record_history(server, workflow_id, GRAPHS[1:5], start + timedelta(days=4), last, len(history) + 1)
+        before = await _load_all(server, workflow_id)
+        await server.compact_workflow_revisions(workflow_id, start + timedelta(days=10))
+        after = await _load_all(server, workflow_id)
+        assert len(after) < len(before)
+        assert all(after[revision] == before[revision] for revision in after)
+        assert max(after) == max(before)
+
+    asyncio.run(scenario())